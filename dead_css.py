@@ -0,0 +1,286 @@
+"""
+dead_css.py — Optional cleanup phases for merge_responsive.py.
+
+Phase 3 strips desktop-only/mobile-only classes and Phase 4 removes CSS rules
+that only target the removed mobile sections. Both are currently disabled in
+merge_responsive.py (the classes drive entry.css visibility and the dead CSS
+only costs bytes), so they live here and are imported only when switched on.
+"""
+
+import bisect
+import re
+
+# Component IDs associated with mobile sections (for CSS cleanup)
+# These are the IDs found in the CSS style blocks that reference removed mobile sections.
+# Stored as a frozenset of bytes, ready for set checks against IDs extracted from the HTML.
+MOBILE_COMPONENT_IDS = frozenset(cid.encode() for cid in [
+    # section-zcTQG6mMON (mobile header)
+    "zcTQG6mMON", "xAr1nd1FVi", "qnlNYTNm0h", "vWZCP58FjA",
+    # section-grGkaPPcTK (mobile hero)
+    "grGkaPPcTK", "a1vtZ1Nc5V", "8sER3Pu7s_", "7L2HE5zJVI", "W0BidVw7rl",
+    "mWUxalHLAM", "zjEGWjDlHx", "fvHPSD_imM", "_n_zp6h1cF", "yleGArvhki",
+    "KvFKlEe_pq", "VxbsSMPgk6",
+    # section-BFSQAbkk13 (mobile sales pitch)
+    "BFSQAbkk13", "bTHdQ2KpZz", "6NwYa8nSA0", "tqoj8HlQQn", "0QXx5-7nGl",
+    "QAlde4iZA3", "a17cEfEECt", "o0YQTk-Paf", "pZLrI_7tj-", "GITzCyHlMj",
+    "SFEhJghodZ", "0uG6vR6fKd", "BQoU9Tw4Gb", "pXTacIo3ao",
+    "zFWKe0l5vV", "t3FDiKGLIj", "i1zMkSWX5K", "LUF4bPa-Sv", "LaHdPQHY8N",
+    "x9Rjf1sV2D", "2SEqCyhTBp", "hw5YOE0186", "fo27K1S0lE", "bvcpPVeFX7",
+    "S7sDCaZ3kE", "hRsQ8tKh6H",
+    "xf68kwd-Do", "8vXbV3JkLP", "pfdZJnHVcK", "6WF7LQ7Vmv", "8QMF2zIWxO",
+    "_UI4r7iz6s", "BkUDIDcBmb", "cwaXzuYN2z", "5OwSPHtRly", "NFCO5rvhFD",
+    "DLDMFrJg21", "TAOhzkUcSw", "EBPJUh1Qjh", "-Q68iHIVo9", "iSwAAgFRUE",
+    "HGNUmw01v2", "SnLml0tTjX", "ErRzoT_ygw", "BsMFvctrdi", "2sg_G_Cuox",
+    "jAkIpW-eRS", "v2Czo-3cxq", "zWyUsM1Kdl", "0ifrO5vGoD", "ZB5BPSbNcQ",
+    "ojCDRsHQ9q", "u1UQiEayuS", "l1G6R0Tuai",
+    # section-_GnYZtBI4o (mobile mega sales letter)
+    "_GnYZtBI4o",
+    # section-To-q1ypEMs (mobile CTA block)
+    "To-q1ypEMs",
+    # section-k_vj1pLUJV (mobile "also getting")
+    "k_vj1pLUJV",
+    # section-UFWCT63ZiY (mobile bonuses)
+    "UFWCT63ZiY",
+    # section-kGFLVwZNUJ (mobile guarantee)
+    "kGFLVwZNUJ",
+    # section-I55y7eLVLD (mobile FAQ)
+    "I55y7eLVLD",
+])
+
+# GHL component IDs referenced from CSS selectors (captures the ID suffix)
+_ID_RE = re.compile(
+    rb'(?:section|row|col|heading|sub-heading|custom-code|video|paragraph|'
+    rb'image|button|c-button|form|bg-section|cheading|csub-heading|cvideo|'
+    rb'cparagraph|cimage|cbutton)-([A-Za-z0-9_-]{6,})'
+)
+
+# Component IDs as they appear in selectors (and @-rule preludes) only.
+# Comments and innermost { ... } declaration blocks are matched first and
+# carry no group, so an ID inside a url(), a custom property or a comment
+# never counts as a reference.
+_SELECTOR_ID_RE = re.compile(rb'/\*.*?\*/|\{[^{}]*+\}|' + _ID_RE.pattern, re.DOTALL)
+
+# desktop-only / mobile-only class tokens, stripped by these passes in order.
+# They must stay sequential: in class="desktop-only mobile-only" the first
+# token's removal is what leaves the second one standalone for the cleanup.
+# Handles class="... desktop-only ...", class="desktop-only ...", class="... desktop-only"
+_VISIBILITY_CLASS_RES = tuple(map(re.compile, (
+    rb'\s+desktop-only(?=[\s"])',
+    rb'desktop-only\s+',
+    rb'\s+mobile-only(?=[\s"])',
+    rb'mobile-only\s+',
+)))
+
+# One per-section CSS block in the <head>: its marker comment up to the next
+# marker (or the end of the head). The body runs over non-'/' bytes possessively
+# and only checks for a marker at each '/', so nothing is re-scanned.
+_STYLE_BLOCK_RE = re.compile(
+    rb'/\* ---- (?:top|Section) styles ----- \*/'
+    rb'(?:[^/]++|/(?!\* ---- (?:top|Section) styles ----- \*/))*+'
+)
+
+# Brace and whitespace scanners for splitting minified CSS into rules
+_CSS_BRACE_RE = re.compile(rb'[{}]')
+_CSS_WS_RE = re.compile(rb'[ \t\n\r]*')
+
+
+def phase3_strip_desktop_only(html):
+    """Phase 3: Strip 'desktop-only' and 'mobile-only' classes from all remaining elements.
+
+    >>> phase3_strip_desktop_only(b'<div class="desktop-only mobile-only">')
+    [Phase 3] Stripped desktop-only (1) and mobile-only (1) class references
+    b'<div class="">'
+    """
+    # Count before
+    desktop_count = html.count(b'desktop-only')
+    mobile_count = html.count(b'mobile-only')
+
+    for pattern in _VISIBILITY_CLASS_RES:
+        html = pattern.sub(b'', html)
+
+    # Clean up any remaining standalone instances
+    html = html.replace(b' desktop-only"', b'"')
+    html = html.replace(b'"desktop-only"', b'""')
+    html = html.replace(b' mobile-only"', b'"')
+    html = html.replace(b'"mobile-only"', b'""')
+
+    remaining = html.count(b'desktop-only') + html.count(b'mobile-only')
+    # Remaining references are likely in CSS (e.g., inside <style> or class selectors)
+    # Those in CSS rule bodies are fine — they're selectors being defined, not usage
+
+    print(f"[Phase 3] Stripped desktop-only ({desktop_count}) and mobile-only ({mobile_count}) class references")
+    if remaining > 0:
+        print(f"  Note: {remaining} references remain (likely in CSS selectors targeting removed sections)")
+
+    return html
+
+
+def _extract_ids_from_css(css_text):
+    """Extract all GHL component IDs referenced by selectors in CSS text."""
+    return frozenset(m.group(1) for m in _SELECTOR_ID_RE.finditer(css_text) if m.group(1))
+
+
+def _block_end(css_text, brace_pos):
+    """Return the index just past the '}' matching the '{' at brace_pos.
+
+    Falls back to the end of the text if the braces never balance.
+    """
+    depth = 0
+    for m in _CSS_BRACE_RE.finditer(css_text, brace_pos):
+        if m.group() == b'{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return m.end()
+    return len(css_text)
+
+
+def _filter_mobile_rules(block_text, mobile_id_set):
+    """Remove individual CSS rules that reference ONLY mobile IDs from a mixed block.
+
+    Splits minified CSS into top-level chunks by matching braces with a
+    regex scan (no per-character Python loop). Handles @media wrappers.
+    The IDs of every chunk are classified by one ID scan over the whole block.
+    Returns the filtered block text and count of bytes removed.
+    """
+    # Tokenize into top-level CSS chunks: rules and @media blocks
+    # A top-level rule ends at } when depth returns to 0
+    # An @media block ends at } when depth returns to 0 (contains nested rules)
+    chunks = []
+    length = len(block_text)
+
+    # Skip leading comment marker + :root block
+    # We want to preserve the comment and :root{} declarations
+    i = _CSS_WS_RE.match(block_text).end()
+    while block_text.startswith(b'/*', i):
+        end = block_text.find(b'*/', i)
+        if end == -1:
+            break
+        chunks.append(('comment', i, end + 2))
+        i = _CSS_WS_RE.match(block_text, end + 2).end()
+
+    # Now parse individual CSS rules/blocks
+    while i < length:
+        # Skip whitespace (kept as part of the following chunk)
+        start = i
+        i = _CSS_WS_RE.match(block_text, i).end()
+        if i >= length:
+            break
+
+        brace_pos = block_text.find(b'{', i)
+        if brace_pos == -1:
+            # Remaining text (trailing whitespace, etc.)
+            chunks.append(('other', start, length))
+            break
+        j = _block_end(block_text, brace_pos)
+
+        if block_text.startswith(b'@', i):
+            # @media or other @-rule (contains nested rules)
+            chunk_type = 'at-rule'
+        elif block_text.startswith(b':root', i):
+            # :root{...} block — always keep (CSS variables)
+            chunk_type = 'root'
+        else:
+            # Regular CSS rule: selector { properties }
+            chunk_type = 'rule'
+        chunks.append((chunk_type, start, j))
+        i = j
+
+    # One scan over the block attributes each ID to the chunk containing it.
+    # Text between chunks is only whitespace, so every ID lands inside one.
+    chunk_starts = [start for _, start, _ in chunks]
+    has_ids = [False] * len(chunks)
+    has_desktop_ids = [False] * len(chunks)
+    for m in _SELECTOR_ID_RE.finditer(block_text):
+        if not m.group(1):
+            continue
+        k = bisect.bisect_right(chunk_starts, m.start()) - 1
+        has_ids[k] = True
+        if m.group(1) not in mobile_id_set:
+            has_desktop_ids[k] = True
+
+    # Now filter: remove rules/at-rules where ALL referenced IDs are mobile-only
+    kept = []
+    removed_bytes = 0
+
+    for k, (chunk_type, start, end) in enumerate(chunks):
+        if (chunk_type in ('rule', 'at-rule')
+                and has_ids[k] and not has_desktop_ids[k]):
+            removed_bytes += end - start
+        else:
+            # Comments, :root, generic CSS with no GHL IDs, and rules that
+            # still reference desktop IDs are kept
+            kept.append(block_text[start:end])
+
+    return b''.join(kept), removed_bytes
+
+
+def phase4_remove_dead_css(html, head_end=None):
+    """Phase 4: Remove CSS rules targeting IDs from the 9 removed mobile sections.
+
+    Two strategies:
+    - Pure mobile blocks (all IDs are mobile): remove the entire block
+    - Mixed blocks (has both mobile + desktop IDs): remove individual rules only
+
+    head_end is the offset of '</style></head>' if the caller already knows it.
+    """
+    if head_end is None:
+        head_end = html.find(b'</style></head>')
+    if head_end == -1:
+        print("[Phase 4] Could not find style/head boundary")
+        return html
+
+    removed_blocks = 0
+    removed_rules_bytes = 0
+    removed_block_bytes = 0
+
+    changes = []  # (start, end, replacement_or_None), in document order
+
+    for m in _STYLE_BLOCK_RE.finditer(html, 0, head_end):
+        block_start, block_end = m.span()
+        block_text = m.group()
+
+        # Extract all IDs in this block with one scan; each hit is then a hash
+        # lookup against the mobile ID set, so the number of mobile IDs never
+        # adds passes over the text
+        ids_in_block = _extract_ids_from_css(block_text)
+
+        if ids_in_block.isdisjoint(MOBILE_COMPONENT_IDS):
+            # No mobile IDs — skip entirely
+            continue
+
+        if ids_in_block <= MOBILE_COMPONENT_IDS:
+            # Pure mobile block — remove entirely
+            changes.append((block_start, block_end, None))
+            removed_block_bytes += block_end - block_start
+            removed_blocks += 1
+        else:
+            # Mixed block — filter at rule level
+            filtered, bytes_removed = _filter_mobile_rules(block_text, MOBILE_COMPONENT_IDS)
+            if bytes_removed > 0:
+                changes.append((block_start, block_end, filtered))
+                removed_rules_bytes += bytes_removed
+
+    # Apply all changes in one forward pass: copy the kept gaps between
+    # changed blocks and join once
+    parts = []
+    last = 0
+    for start, end, replacement in changes:
+        if replacement is None:
+            # Full removal — also eat preceding newline (unless an earlier
+            # change already consumed it)
+            if start > last and html[start - 1:start] == b'\n':
+                start -= 1
+            replacement = b''
+        parts.append(html[last:start])
+        parts.append(replacement)
+        last = end
+    parts.append(html[last:])
+    html = b''.join(parts)
+
+    total_removed = removed_block_bytes + removed_rules_bytes
+    print(f"[Phase 4] Removed {removed_blocks} pure-mobile CSS blocks ({removed_block_bytes:,} bytes)")
+    print(f"  + filtered mobile rules from mixed blocks ({removed_rules_bytes:,} bytes)")
+    print(f"  Total CSS removed: {total_removed:,} bytes")
+    return html
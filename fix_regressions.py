@@ -123,44 +123,62 @@ def fix_ctas():
     # We match the full CTA block from <div class="top_right_sec big_cta"> through its closing </div>s.
     # The approach: find each CTA block, replace the inner content.
 
-    # Pattern: Match from inner_white_bkg opening through the security text block, keeping email form
+    # Pattern: Match from inner_white_bkg opening through the security text block, keeping email form.
+    # Every run of whitespace / attribute text is possessive (*+) so a near-miss on this ~500KB
+    # document fails immediately instead of backtracking through the earlier runs.
     cta_inner_pattern = re.compile(
-        r'(<div class="inner_white_bkg">\s*)'                      # inner_white_bkg open
-        r'(<div style="display: inline-block[^"]*">\s*'            # product image wrapper
-        r'<img class="product_image"[^>]*>\s*'
-        r'</div>\s*)'
-        r'(<h4 class="txt_red">Your Price: Only \$47\.00</h4>\s*'  # pricing section
-        r'<h4 class="black">List Price \$297</h4>\s*'
-        r'<h4 class="small">You\'re Saving \$250\.00 Today</h4>\s*)'
-        r'<p class="savetoday fsize15">Download The Install Pack and 7 Bonuses For Just \$47\.00!</p>\s*'  # modified copy
-        r'<p class="avail_dwld"><img[^>]*> Now available for instant download</p>\s*'
-        r'<p class="fsize15 mb15">Delivered instantly\. Start installing the pack in the next 2 minutes\.</p>\s*'
-        r'(<div class="cta-email-form">\s*'                        # email form (KEEP)
-        r'<iframe[^>]*></iframe>\s*'
-        r'</div>\s*)'
-        r'<div class="text-center mt10">\s*'                       # non-original security block
-        r'<p style="margin:0px auto 10px;text-align:center; color: #061130;width: 100%; max-width: 290px;">We securely process payments with 256-bit security encryption</p>\s*'
-        r'<div class="text-center">\s*'
-        r'<img class="authorized_payments"[^>]*>\s*'
-        r'</div>\s*'
-        r'<p class="mbc_logo_txt" style="margin:20px auto 0; color: #061130; width: 100%; max-width: 290px;"><img alt="mbc_logo" src="images/6508e799a8ce7068941edcae\.png" loading="lazy"> BACKED BY OUR UNCONDITIONAL<br>30 DAY MONEY BACK GUARANTEE</p>\s*'
-        r'</div>\s*'
-        r'(<div class="text-center">\s*'                           # secure checkout img
-        r'<img class="secure_checkout_img"[^>]*>\s*'
+        r'(<div class="inner_white_bkg">\s*+)'                     # inner_white_bkg open
+        r'(<div style="display: inline-block[^"]*+">\s*+'          # product image wrapper
+        r'<img class="product_image"[^>]*+>\s*+'
+        r'</div>\s*+)'
+        r'(<h4 class="txt_red">Your Price: Only \$47\.00</h4>\s*+' # pricing section
+        r'<h4 class="black">List Price \$297</h4>\s*+'
+        r'<h4 class="small">You\'re Saving \$250\.00 Today</h4>\s*+)'
+        r'<p class="savetoday fsize15">Download The Install Pack and 7 Bonuses For Just \$47\.00!</p>\s*+'  # modified copy
+        r'<p class="avail_dwld"><img[^>]*+> Now available for instant download</p>\s*+'
+        r'<p class="fsize15 mb15">Delivered instantly\. Start installing the pack in the next 2 minutes\.</p>\s*+'
+        r'(<div class="cta-email-form">\s*+'                       # email form (KEEP)
+        r'<iframe[^>]*+></iframe>\s*+'
+        r'</div>\s*+)'
+        r'<div class="text-center mt10">\s*+'                      # non-original security block
+        r'<p style="margin:0px auto 10px;text-align:center; color: #061130;width: 100%; max-width: 290px;">We securely process payments with 256-bit security encryption</p>\s*+'
+        r'<div class="text-center">\s*+'
+        r'<img class="authorized_payments"[^>]*+>\s*+'
+        r'</div>\s*+'
+        r'<p class="mbc_logo_txt" style="margin:20px auto 0; color: #061130; width: 100%; max-width: 290px;"><img alt="mbc_logo" src="images/6508e799a8ce7068941edcae\.png" loading="lazy"> BACKED BY OUR UNCONDITIONAL<br>30 DAY MONEY BACK GUARANTEE</p>\s*+'
+        r'</div>\s*+'
+        r'(<div class="text-center">\s*+'                          # secure checkout img
+        r'<img class="secure_checkout_img"[^>]*+>\s*+'
         r'</div>)',
-        re.DOTALL
     )
 
+    # The sticky sidebar CTA (inside sticky_buy_element) gets a shorter H1:
+    # "GET INSTANT ACCESS TO THE 1CCO INSTALL PACK FOR ONLY $47.00" (with class="small")
+    # instead of the full "GET INSTANT ACCESS TO THE 1 CLICK CLIENT ONBOARDING INSTALL PACK...".
+    # It is detected from the text just before the match, so both variants are written in
+    # the same pass instead of re-scanning the whole document afterwards.
+    full_h1 = '<h1>GET INSTANT ACCESS TO THE 1 CLICK CLIENT ONBOARDING INSTALL PACK FOR ONLY $47.00</h1>\n'
+    sticky_h1 = '<h1 class="small">GET INSTANT ACCESS TO THE 1CCO INSTALL PACK FOR ONLY $47.00</h1>\n'
+    sticky_count = 0
+
     def replace_cta(match):
+        nonlocal sticky_count
         inner_white_bkg = match.group(1)
         product_img = match.group(2)
         pricing = match.group(3)
         email_form = match.group(4)
         secure_checkout = match.group(5)
 
+        context = match.string[max(0, match.start() - 500):match.start()]
+        if 'sticky_buy_element' in context:
+            sticky_count += 1
+            h1 = sticky_h1
+        else:
+            h1 = full_h1
+
         return (
             inner_white_bkg +
-            '<h1>GET INSTANT ACCESS TO THE 1 CLICK CLIENT ONBOARDING INSTALL PACK FOR ONLY $47.00</h1>\n'
+            h1 +
             '\t\t\t\t\t\t\t<p class="text-center"><span class="bkg_yellow small_headings" style="background: #ffe09a; padding: 0 5px; border-radius: 3px;">and also get 7 free bonuses valued at $3929</span></p>\n'
             '\t\t\t\t\t\t\t' +
             product_img +
@@ -177,35 +195,12 @@ def fix_ctas():
             secure_checkout
         )
 
-    count = len(cta_inner_pattern.findall(html))
-    html = cta_inner_pattern.sub(replace_cta, html)
+    html, count = cta_inner_pattern.subn(replace_cta, html)
     print(f"  Restored H1 + yellow badge + Install Now button + Click Here link in {count} CTA blocks")
-
-    # =========================================================================
-    # STEP 2: Fix sticky sidebar CTA — use shorter H1 title
-    # =========================================================================
-    # The sticky sidebar CTA (inside sticky_buy_element) should have a shorter H1:
-    # "GET INSTANT ACCESS TO THE 1CCO INSTALL PACK FOR ONLY $47.00" (with class="small")
-    # instead of the full "GET INSTANT ACCESS TO THE 1 CLICK CLIENT ONBOARDING INSTALL PACK..."
-
-    sticky_h1_pattern = re.compile(
-        r'(sticky_buy_element">\s*'
-        r'<div style="[^"]*position: sticky[^"]*">\s*'
-        r'<div class="top_right_sec big_cta">\s*'
-        r'<p class="toptxt">DIGITAL DOWNLOAD NOW AVAILABLE</p>\s*'
-        r'<div class="inner_white_bkg">\s*)'
-        r'<h1>GET INSTANT ACCESS TO THE 1 CLICK CLIENT ONBOARDING INSTALL PACK FOR ONLY \$47\.00</h1>',
-        re.DOTALL
-    )
-
-    if sticky_h1_pattern.search(html):
-        html = sticky_h1_pattern.sub(
-            r'\g<1><h1 class="small">GET INSTANT ACCESS TO THE 1CCO INSTALL PACK FOR ONLY $47.00</h1>',
-            html
-        )
+    if sticky_count:
         print("  Fixed sticky sidebar H1 to use shorter title with class='small'")
     else:
-        print("  Note: Sticky sidebar H1 pattern not found (may already be correct)")
+        print("  Note: Sticky sidebar CTA not found (may already be correct)")
 
     # Write the fixed HTML
     with open(INDEX_HTML, "w") as f:
@@ -16,6 +16,7 @@ This is a value-only change — no selectors, blocks, or class attributes are
 touched. Safe per session 12 lessons.
 """
 
+import mmap
 import os
 import re
 import shutil
@@ -80,7 +81,7 @@ SIZE_TO_TOKEN = {
 }
 
 # CSS variable definitions
-CSS_VARS = """/* === Type Scale (Phase 2: Font Harmonization) === */
+CSS_VARS = b"""/* === Type Scale (Phase 2: Font Harmonization) === */
 :root {
   --fs-xs: 13px;
   --fs-sm: 15px;
@@ -94,32 +95,24 @@ CSS_VARS = """/* === Type Scale (Phase 2: Font Harmonization) === */
 }
 """
 
+# Same mapping keyed by the px value as written in CSS ("20", "20.0", "16.5"),
+# so the common case is a plain string lookup with no float parsing
+_VAL_STR_TO_TOKEN = {str(px).encode(): token for px, token in SIZE_TO_TOKEN.items()}
+_VAL_STR_TO_TOKEN.update(
+    {f"{px}.0".encode(): token for px, token in SIZE_TO_TOKEN.items() if isinstance(px, int)}
+)
+
+# Replacement declaration for each token, built once rather than per match
+_TOKEN_REPL = {token: f"font-size:var(--fs-{token})".encode() for token in TYPE_SCALE}
+
+# <style> blocks; group 2 is the CSS between the tags
+_STYLE_BLOCK_RE = re.compile(rb'(<style[^>]*>)(.*?)(</style>)', re.DOTALL)
+
+# font-size declarations inside CSS (captures the px value)
+_FONT_SIZE_RE = re.compile(rb'font-size:\s*([\d.]+)px')
 
-def harmonize_fonts(html_path=HTML_PATH):
-    with open(html_path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    original_size = len(content)
-
-    # Create backup
-    backup_path = html_path + ".pre-harmonize"
-    shutil.copy2(html_path, backup_path)
-    print(f"Backup: {backup_path}")
-
-    # Step 1: Inject CSS variables into the first <style> tag
-    first_style = content.find("<style")
-    if first_style == -1:
-        print("ERROR: No <style> tag found!")
-        return
-    # Find the end of the opening <style...> tag
-    style_open_end = content.find(">", first_style) + 1
-    content = content[:style_open_end] + "\n" + CSS_VARS + content[style_open_end:]
-    print(f"Injected CSS variables after first <style> tag")
-
-    # Step 2: Replace font-size values in <style> blocks only
-    # We need to be careful to only replace inside <style>...</style>, not in
-    # inline style="" attributes in the body
 
+def harmonize_fonts(html_path=HTML_PATH):
     total_replacements = 0
     token_counts = {t: 0 for t in TYPE_SCALE}
     unmatched = []
@@ -128,47 +121,73 @@ def harmonize_fonts(html_path=HTML_PATH):
         nonlocal total_replacements
         full = match.group(0)        # e.g., "font-size:20px" or "font-size: 16.5px"
         val_str = match.group(1)     # e.g., "20" or "16.5"
-        val = float(val_str)
+        token = _VAL_STR_TO_TOKEN.get(val_str)
+
+        if token is None:
+            # Unusual spelling (e.g. b"16.50") — fall back to numeric lookup
+            val = float(val_str)
 
-        # Convert int-like floats
-        if val == int(val):
-            val = int(val)
+            # Convert int-like floats
+            if val == int(val):
+                val = int(val)
 
-        if val in SIZE_TO_TOKEN:
+            if val not in SIZE_TO_TOKEN:
+                unmatched.append(val)
+                return full
             token = SIZE_TO_TOKEN[val]
-            token_counts[token] += 1
-            total_replacements += 1
-            return f"font-size:var(--fs-{token})"
-        else:
-            unmatched.append(val)
-            return full
-
-    # Process each <style> block
-    def process_style_block(m):
-        tag_open = m.group(1)  # <style...>
-        css_content = m.group(2)
-        tag_close = m.group(3)  # </style>
-
-        # Replace font-size declarations within CSS
-        css_content = re.sub(
-            r'font-size:\s*([\d.]+)px',
-            replace_font_size,
-            css_content
-        )
-        return tag_open + css_content + tag_close
-
-    content = re.sub(
-        r'(<style[^>]*>)(.*?)(</style>)',
-        process_style_block,
-        content,
-        flags=re.DOTALL
-    )
-
-    # Write
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(content)
-
-    new_size = len(content)
+
+        token_counts[token] += 1
+        total_replacements += 1
+        return _TOKEN_REPL[token]
+
+    # The HTML is processed as raw bytes straight off a read-only mapping of
+    # the file — no UTF-8 decode on the way in or encode on the way out.
+    # The output is collected as a list of segments (untouched slices plus
+    # rewritten CSS) and written one by one, so the new document is never
+    # assembled as one string.
+    segments = []
+    with open(html_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        original_size = len(mm)
+
+        # Create backup
+        backup_path = html_path + ".pre-harmonize"
+        shutil.copy2(html_path, backup_path)
+        print(f"Backup: {backup_path}")
+
+        # Step 1: Inject CSS variables into the first <style> tag
+        first_style = mm.find(b"<style")
+        if first_style == -1:
+            print("ERROR: No <style> tag found!")
+            return
+        # Find the end of the opening <style...> tag
+        style_open_end = mm.find(b">", first_style) + 1
+        segments += [mm[:style_open_end], b"\n", CSS_VARS]
+        print(f"Injected CSS variables after first <style> tag")
+
+        # Step 2: Replace font-size values in <style> blocks only
+        # We need to be careful to only replace inside <style>...</style>, not in
+        # inline style="" attributes in the body
+        last = style_open_end
+        for m in _STYLE_BLOCK_RE.finditer(mm):
+            css_start, css_end = m.span(2)
+            css_start = max(css_start, last)
+            segments.append(mm[last:css_start])
+            segments.append(_FONT_SIZE_RE.sub(replace_font_size, mm[css_start:css_end]))
+            last = css_end
+        segments.append(mm[last:])
+
+    # Write each segment straight to the file descriptor (no io buffer copy);
+    # the loop only repeats if the kernel accepts a partial write
+    fd = os.open(html_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        for segment in segments:
+            view = memoryview(segment)
+            while view:
+                view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+    new_size = sum(map(len, segments))
 
     print(f"\nResults:")
     print(f"  Total replacements: {total_replacements}")
@@ -0,0 +1,58 @@
+"""
+html_regex.py — Regex helpers shared by the site scripts.
+
+Kept in one place so the scripts that tokenize or rewrite the page the same
+way use the same pattern, and a fix to it only has to be made once.
+"""
+
+import re
+
+# Tag tokenizer for <div> depth tracking. Comments and <script>/<style> bodies
+# are consumed whole (group 1 names the raw-text tag) so markup-looking text
+# inside them never shifts the depth. Group 2 is a closing </div>, group 3 an
+# opening <div ...> including its quoted attribute values. Tolerant of any
+# case and of whitespace before the closing '>'.
+#
+# Every loop is possessive and stops at the first terminator, as a lazy .*?
+# would, without backtracking through the skipped text: a comment body runs
+# over non-'-' bytes and any '-' that doesn't start '->', a raw-text body over
+# non-'<' bytes and any '<' that doesn't start its closing tag.
+_DIV_TAG_PATTERN = (
+    rb'<!--(?:[^-]++|-(?!->))*+-->'
+    rb'|<(script|style)\b(?:[^<]++|<(?!/\1\s*>))*+</\1\s*>'
+    rb'|(</div\s*>)'
+    rb'|(<div(?=[\s/>])(?:[^>"\']++|"[^"]*+"|\'[^\']*+\')*+>?)'
+)
+
+# The same tokenizer for bytes (merge_responsive.py) and str (optimize_site.py)
+DIV_TAG_RE = re.compile(_DIV_TAG_PATTERN, re.IGNORECASE)
+DIV_TAG_STR_RE = re.compile(_DIV_TAG_PATTERN.decode(), re.IGNORECASE)
+
+
+def trie_regex(words):
+    """Regex source matching any of words, factored into a prefix trie.
+
+    The stdlib stand-in for an Aho-Corasick automaton: IDs share a handful of
+    prefixes ("section-", "row-", "col-"), so at each position the engine
+    follows one branch per character instead of trying every word in turn. A
+    longer continuation is always tried before ending a word, so the longest
+    word wins, as with a longest-first alternation.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}  # end of word
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        ends_here = '' in node
+        if not branches:
+            return ''
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if ends_here else group
+
+    return build(trie)
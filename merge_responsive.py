@@ -8,14 +8,22 @@ removes dead CSS for removed sections, adds responsive overrides, normalizes CTA
 Expected result: 23 sections → 14 sections, ~13% HTML size reduction.
 """
 
+import importlib
+import mmap
 import re
 import shutil
 import os
 
+from html_regex import DIV_TAG_RE
+
 SITE_DIR = os.path.dirname(os.path.abspath(__file__))
 INDEX_PATH = os.path.join(SITE_DIR, "index.html")
 BACKUP_PATH = os.path.join(SITE_DIR, "index.html.pre-merge")
 
+# Phases 3 and 4 live in dead_css.py and are only imported when enabled
+ENABLE_CLASS_STRIP = False
+ENABLE_DEAD_CSS_STRIP = False
+
 # 9 mobile-only section IDs to remove
 MOBILE_SECTIONS_TO_REMOVE = [
     "section-zcTQG6mMON",   # mobile header
@@ -29,45 +37,8 @@ MOBILE_SECTIONS_TO_REMOVE = [
     "section-I55y7eLVLD",   # mobile FAQ
 ]
 
-# Component IDs associated with mobile sections (for CSS cleanup)
-# These are the IDs found in the CSS style blocks that reference removed mobile sections
-MOBILE_COMPONENT_IDS = [
-    # section-zcTQG6mMON (mobile header)
-    "zcTQG6mMON", "xAr1nd1FVi", "qnlNYTNm0h", "vWZCP58FjA",
-    # section-grGkaPPcTK (mobile hero)
-    "grGkaPPcTK", "a1vtZ1Nc5V", "8sER3Pu7s_", "7L2HE5zJVI", "W0BidVw7rl",
-    "mWUxalHLAM", "zjEGWjDlHx", "fvHPSD_imM", "_n_zp6h1cF", "yleGArvhki",
-    "KvFKlEe_pq", "VxbsSMPgk6",
-    # section-BFSQAbkk13 (mobile sales pitch)
-    "BFSQAbkk13", "bTHdQ2KpZz", "6NwYa8nSA0", "tqoj8HlQQn", "0QXx5-7nGl",
-    "QAlde4iZA3", "a17cEfEECt", "o0YQTk-Paf", "pZLrI_7tj-", "GITzCyHlMj",
-    "SFEhJghodZ", "0uG6vR6fKd", "BQoU9Tw4Gb", "pXTacIo3ao",
-    "zFWKe0l5vV", "t3FDiKGLIj", "i1zMkSWX5K", "LUF4bPa-Sv", "LaHdPQHY8N",
-    "x9Rjf1sV2D", "2SEqCyhTBp", "hw5YOE0186", "fo27K1S0lE", "bvcpPVeFX7",
-    "S7sDCaZ3kE", "hRsQ8tKh6H",
-    "xf68kwd-Do", "8vXbV3JkLP", "pfdZJnHVcK", "6WF7LQ7Vmv", "8QMF2zIWxO",
-    "_UI4r7iz6s", "BkUDIDcBmb", "cwaXzuYN2z", "5OwSPHtRly", "NFCO5rvhFD",
-    "DLDMFrJg21", "TAOhzkUcSw", "EBPJUh1Qjh", "-Q68iHIVo9", "iSwAAgFRUE",
-    "HGNUmw01v2", "SnLml0tTjX", "ErRzoT_ygw", "BsMFvctrdi", "2sg_G_Cuox",
-    "jAkIpW-eRS", "v2Czo-3cxq", "zWyUsM1Kdl", "0ifrO5vGoD", "ZB5BPSbNcQ",
-    "ojCDRsHQ9q", "u1UQiEayuS", "l1G6R0Tuai",
-    # section-_GnYZtBI4o (mobile mega sales letter)
-    "_GnYZtBI4o",
-    # section-To-q1ypEMs (mobile CTA block)
-    "To-q1ypEMs",
-    # section-k_vj1pLUJV (mobile "also getting")
-    "k_vj1pLUJV",
-    # section-UFWCT63ZiY (mobile bonuses)
-    "UFWCT63ZiY",
-    # section-kGFLVwZNUJ (mobile guarantee)
-    "kGFLVwZNUJ",
-    # section-I55y7eLVLD (mobile FAQ)
-    "I55y7eLVLD",
-]
-
-RESPONSIVE_CSS = """
-/* === Responsive overrides (merged from mobile sections) === */
 
+_RESPONSIVE_CSS_SOURCE = b"""
 /* After removing mobile-only sections, desktop sections must show on mobile */
 @media only screen and (max-width: 767px) {
   .desktop-only { display: block !important; }
@@ -95,9 +66,92 @@ RESPONSIVE_CSS = """
 """
 
 
+def _minify_css(css):
+    """Strip comments and insignificant whitespace from a CSS snippet.
+
+    Meant for the hand-written rules above: it does not guard strings or
+    selectors where a space before ":" is significant.
+    """
+    css = re.sub(rb'/\*.*?\*/', b'', css, flags=re.DOTALL)
+    css = re.sub(rb'\s+', b' ', css)
+    css = re.sub(rb' ?([{}:;,]) ?', rb'\1', css)
+    return css.replace(b';}', b'}').strip()
+
+
+# Minified once at import; the banner comment is kept so the injected block
+# can still be found in the output
+RESPONSIVE_CSS = (
+    b"\n/* === Responsive overrides (merged from mobile sections) === */\n"
+    + _minify_css(_RESPONSIVE_CSS_SOURCE)
+    + b"\n"
+)
+
+# id="..." attribute naming one of the sections to remove, as one alternation
+# so a single scan of the body locates all nine
+_SECTION_MARKER_RE = re.compile(
+    rb'id=["\']('
+    + b'|'.join(re.escape(sid.encode()) for sid in MOBILE_SECTIONS_TO_REMOVE)
+    + rb')["\']'
+)
+
+# Bytes that may precede an attribute name inside a tag. Tested against a
+# single indexed byte (an int), which works for bytes, bytearray and mmap alike
+_ATTR_SEPARATORS = frozenset(b' \t\n\r\f"\'/')
+
+# Upper bound on the length of an opening tag, for the backwards search from
+# an id marker to the '<' of its tag
+_MAX_TAG_BYTES = 4096
+
+# Sanity limits for the Phase 2 tag walk: the largest section is ~140 KB and
+# the page nests divs under 20 levels deep
+_MAX_SECTION_BYTES = 2 * 1024 * 1024
+_MAX_DIV_DEPTH = 512
+
+# order_page_ references. A pure literal, so re can use its fast substring
+# search; whether a hit is a CTA link on the site's own domain is decided by
+# checking the bytes just before it (an optional prefix group would force a
+# match attempt at every position).
+_ORDER_PAGE_RE = re.compile(rb'order_page_')
+_CTA_DOMAIN = b'1clickonboarding.com/'
+
+# Everything verify() counts, tallied in a single scan. The leading lookahead
+# on the first bytes of the alternatives lets most positions fail on one
+# class test instead of trying all seven branches.
+_VERIFY_RE = re.compile(
+    rb'(?=[<idmoJ])(?:'
+    rb'(?P<body><body>)'
+    rb'|(?P<section>id="(?P<section_id>section-[^"]+))'
+    rb'|(?P<desktop>desktop-only)'
+    rb'|(?P<mobile>mobile-only)'
+    rb'|(?P<order_underscore>order_page_)'
+    rb'|(?P<order_dash>order-page)'
+    rb'|(?P<form>JfoVUQbTOONUDr9Jraq7)'
+    rb')'
+)
+_REMOVED_SECTION_IDS = frozenset(sid.encode() for sid in MOBILE_SECTIONS_TO_REMOVE)
+
+
+def _splice(buf, edits):
+    """Return a bytearray copy of buf with (start, end, replacement) edits applied.
+
+    Edits must be sorted and non-overlapping. Untouched text is sliced through
+    a memoryview, so the result is assembled with a single copy. A bytearray
+    is returned so later phases can splice into it in place.
+    """
+    parts = []
+    last = 0
+    with memoryview(buf) as view:
+        for start, end, replacement in edits:
+            parts.append(view[last:start])
+            parts.append(replacement)
+            last = end
+        parts.append(view[last:])
+        return bytearray().join(parts)
+
+
 def phase1_backup():
     """Phase 1: Create backup."""
-    shutil.copy2(INDEX_PATH, BACKUP_PATH)
+    shutil.copyfile(INDEX_PATH, BACKUP_PATH)
     print(f"[Phase 1] Backup created: {BACKUP_PATH}")
     print(f"  Original size: {os.path.getsize(INDEX_PATH):,} bytes")
 
@@ -105,317 +159,132 @@ def phase1_backup():
 def phase2_remove_mobile_sections(html):
     """Phase 2: Remove 9 mobile-only sections from body HTML.
 
-    Uses regex to find all <div and </div> tags, then tracks depth to find
-    the matching closing tag for each section.
-    """
-    removed_count = 0
-
-    # Precompile regex for finding div open/close tags
-    div_tag_re = re.compile(r'<div[\s>]|</div>')
+    Tokenizes the <div> and </div> tags (skipping comments and <script>/<style>
+    bodies), identifies each section by the id attribute of its own opening
+    tag, and tracks depth to find the matching closing tag. All nine spans
+    are collected in a single walk over the tag stream, then cut out in a
+    single rebuild.
 
-    for section_id in MOBILE_SECTIONS_TO_REMOVE:
-        # Find the section start marker
-        marker = f'id="{section_id}"'
-        start_idx = html.find(marker)
-
-        if start_idx == -1:
-            print(f"  WARNING: Section {section_id} not found in HTML")
-            continue
-
-        # Walk backwards to find the opening <div that contains this id
-        div_start = html.rfind('<div', 0, start_idx)
-        if div_start == -1:
-            print(f"  WARNING: Could not find opening <div for {section_id}")
-            continue
-
-        # Use regex to find all div tags from div_start onwards
-        depth = 0
-        end_pos = -1
-
-        for m in div_tag_re.finditer(html, div_start):
-            tag = m.group()
-            if tag.startswith('</'):
-                depth -= 1
-                if depth == 0:
-                    end_pos = m.end()
-                    break
-            else:
-                depth += 1
-
-        if end_pos == -1:
-            print(f"  WARNING: Could not find matching </div> for {section_id}")
-            continue
-
-        # Remove the section
-        removed_bytes = end_pos - div_start
-        html = html[:div_start] + html[end_pos:]
-        removed_count += 1
-        print(f"  Removed: {section_id} ({removed_bytes:,} bytes)")
-
-    print(f"[Phase 2] Removed {removed_count} mobile-only sections")
-    return html
-
-
-def phase3_strip_desktop_only(html):
-    """Phase 3: Strip 'desktop-only' and 'mobile-only' classes from all remaining elements."""
-
-    # Count before
-    desktop_count = html.count('desktop-only')
-    mobile_count = html.count('mobile-only')
-
-    # Remove ' desktop-only' and ' mobile-only' from class attributes
-    # Handle cases: class="... desktop-only ...", class="desktop-only ...", class="... desktop-only"
-    html = re.sub(r'\s+desktop-only(?=[\s"])', '', html)
-    html = re.sub(r'desktop-only\s+', '', html)
-    html = re.sub(r'\s+mobile-only(?=[\s"])', '', html)
-    html = re.sub(r'mobile-only\s+', '', html)
-
-    # Clean up any remaining standalone instances
-    html = html.replace(' desktop-only"', '"')
-    html = html.replace('"desktop-only"', '""')
-    html = html.replace(' mobile-only"', '"')
-    html = html.replace('"mobile-only"', '""')
-
-    remaining = html.count('desktop-only') + html.count('mobile-only')
-    # Check if remaining are only in CSS (e.g., inside <style> or class selectors)
-    # Those in CSS rule bodies are fine — they're selectors being defined, not usage
-
-    print(f"[Phase 3] Stripped desktop-only ({desktop_count}) and mobile-only ({mobile_count}) class references")
-    if remaining > 0:
-        print(f"  Note: {remaining} references remain (likely in CSS selectors targeting removed sections)")
-
-    return html
-
-
-def _extract_ids_from_css(css_text):
-    """Extract all GHL component IDs referenced in CSS text."""
-    id_re = re.compile(
-        r'(?:section|row|col|heading|sub-heading|custom-code|video|paragraph|'
-        r'image|button|c-button|form|bg-section|cheading|csub-heading|cvideo|'
-        r'cparagraph|cimage|cbutton)-([A-Za-z0-9_-]{6,})'
-    )
-    return set(id_re.findall(css_text))
-
-
-def _filter_mobile_rules(block_text, mobile_id_set):
-    """Remove individual CSS rules that reference ONLY mobile IDs from a mixed block.
-
-    Parses minified CSS by tracking brace depth. Handles @media wrappers.
-    Returns the filtered block text and count of bytes removed.
+    Accepts bytes, a bytearray or the read-only mmap of the file, and returns
+    a new bytearray.
     """
-    # Tokenize into top-level CSS chunks: rules and @media blocks
-    # A top-level rule ends at } when depth returns to 0
-    # An @media block ends at } when depth returns to 0 (contains nested rules)
-    chunks = []
-    i = 0
-    length = len(block_text)
-
-    # Skip leading comment marker + :root block
-    # We want to preserve the comment and :root{} declarations
-    while i < length:
-        # Skip whitespace
-        if block_text[i] in ' \t\n\r':
-            i += 1
+    # Walk the tag stream of the body once, like a parser would: a section
+    # starts at the opening <div> whose own id attribute names it, and ends
+    # at the </div> that brings the depth back to where that tag was. ids
+    # that only appear in comments, scripts or other attributes never match.
+    body_start = max(html.find(b'<body'), 0)
+
+    # One combined scan finds every marker; a short bounded rfind from each
+    # gives the start of the tag it sits in. Only tags starting at one of
+    # these offsets need their attributes checked during the walk.
+    candidates = {}  # tag_start -> (marker offset, section_id)
+    for marker in _SECTION_MARKER_RE.finditer(html, body_start):
+        marker_start = marker.start()
+        if marker_start == 0 or html[marker_start - 1] not in _ATTR_SEPARATORS:
+            # Part of a longer attribute name, e.g. data-id="..."
             continue
-        # Skip comments
-        if block_text[i:i+2] == '/*':
-            end = block_text.find('*/', i)
-            if end == -1:
-                break
-            chunks.append(('comment', block_text[i:end+2]))
-            i = end + 2
-            continue
-        # Found start of a rule or @-rule
-        break
-
-    # Now parse individual CSS rules/blocks
-    while i < length:
-        # Skip whitespace
-        start = i
-        while i < length and block_text[i] in ' \t\n\r':
-            i += 1
-        if i >= length:
+        tag_start = html.rfind(b'<', max(marker_start - _MAX_TAG_BYTES, body_start), marker_start)
+        if tag_start != -1:
+            candidates.setdefault(tag_start, (marker_start, marker.group(1).decode()))
+
+    spans = []  # (div_start, end_pos, section_id)
+    open_sections = []  # (depth before the opening tag, div_start, section_id)
+    found = set()
+    depth = 0
+
+    # No section can start after the last candidate tag or run for more than
+    # _MAX_SECTION_BYTES, so truncated or malformed HTML never drags the walk
+    # on to the end of the document
+    last_candidate = max(candidates, default=body_start - 1)
+    walk_end = min(len(html), last_candidate + _MAX_SECTION_BYTES)
+
+    for m in DIV_TAG_RE.finditer(html, body_start, walk_end):
+        if not open_sections and m.start() > last_candidate:
             break
-
-        # Check for @media or @-rule
-        if block_text[i] == '@':
-            # Find the opening brace of the @-rule
-            brace_pos = block_text.find('{', i)
-            if brace_pos == -1:
-                chunks.append(('other', block_text[start:]))
-                break
-            # Now track nested braces to find the matching close
-            depth = 1
-            j = brace_pos + 1
-            while j < length and depth > 0:
-                if block_text[j] == '{':
-                    depth += 1
-                elif block_text[j] == '}':
-                    depth -= 1
-                j += 1
-            rule_text = block_text[start:j]
-            chunks.append(('at-rule', rule_text))
-            i = j
-            continue
-
-        # Check for :root or regular rule — find opening {
-        if block_text[i:i+5] == ':root':
-            # :root{...} block — always keep (CSS variables)
-            brace_pos = block_text.find('{', i)
-            if brace_pos == -1:
-                chunks.append(('other', block_text[start:]))
+        if m.group(2):
+            depth -= 1
+            if open_sections and open_sections[-1][0] == depth:
+                _, div_start, section_id = open_sections.pop()
+                spans.append((div_start, m.end(), section_id))
+                if len(spans) == len(MOBILE_SECTIONS_TO_REMOVE):
+                    break
+        elif m.group(3):
+            marker_start, section_id = candidates.get(m.start(), (-1, None))
+            if marker_start != -1 and marker_start < m.end(3):
+                # The marker is inside this opening tag's attributes
+                if section_id not in found:
+                    found.add(section_id)
+                    open_sections.append((depth, m.start(), section_id))
+            depth += 1
+            if depth > _MAX_DIV_DEPTH:
+                print(f"  WARNING: <div> nesting exceeds {_MAX_DIV_DEPTH} levels, stopping")
                 break
-            depth = 1
-            j = brace_pos + 1
-            while j < length and depth > 0:
-                if block_text[j] == '{':
-                    depth += 1
-                elif block_text[j] == '}':
-                    depth -= 1
-                j += 1
-            chunks.append(('root', block_text[start:j]))
-            i = j
-            continue
 
-        # Regular CSS rule: selector { properties }
-        brace_pos = block_text.find('{', i)
-        if brace_pos == -1:
-            # Remaining text (trailing whitespace, etc.)
-            chunks.append(('other', block_text[start:]))
-            break
-
-        # Track braces for the rule body
-        depth = 1
-        j = brace_pos + 1
-        while j < length and depth > 0:
-            if block_text[j] == '{':
-                depth += 1
-            elif block_text[j] == '}':
-                depth -= 1
-            j += 1
-        rule_text = block_text[start:j]
-        chunks.append(('rule', rule_text))
-        i = j
-
-    # Now filter: remove rules/at-rules where ALL referenced IDs are mobile-only
-    kept = []
-    removed_bytes = 0
-
-    for chunk_type, chunk_text in chunks:
-        if chunk_type in ('comment', 'root', 'other'):
-            kept.append(chunk_text)
-            continue
-
-        ids_in_chunk = _extract_ids_from_css(chunk_text)
-
-        if not ids_in_chunk:
-            # No GHL IDs — keep (generic CSS)
-            kept.append(chunk_text)
+    for section_id in MOBILE_SECTIONS_TO_REMOVE:
+        if section_id not in found:
+            print(f"  WARNING: Section {section_id} not found in HTML")
+    for _, _, section_id in open_sections:
+        print(f"  WARNING: Could not find matching </div> for {section_id}")
+
+    # Remove all sections in one pass, skipping any nested inside an earlier span
+    edits = []
+    last = 0
+    for div_start, end_pos, section_id in sorted(spans):
+        if div_start < last:
             continue
+        edits.append((div_start, end_pos, b''))
+        last = end_pos
+        print(f"  Removed: {section_id} ({end_pos - div_start:,} bytes)")
+    removed_count = len(edits)
+    html = _splice(html, edits)
 
-        # If ALL IDs in this rule are mobile-only, remove it
-        if ids_in_chunk.issubset(mobile_id_set):
-            removed_bytes += len(chunk_text)
-        else:
-            kept.append(chunk_text)
-
-    return ''.join(kept), removed_bytes
+    print(f"[Phase 2] Removed {removed_count} mobile-only sections")
+    return html
 
 
-def phase4_remove_dead_css(html):
-    """Phase 4: Remove CSS rules targeting IDs from the 9 removed mobile sections.
+def phase5_add_responsive_css(html, head_end=None):
+    """Phase 5: Inject responsive CSS overrides before </style></head>.
 
-    Two strategies:
-    - Pure mobile blocks (all IDs are mobile): remove the entire block
-    - Mixed blocks (has both mobile + desktop IDs): remove individual rules only
+    head_end is the offset of '</style></head>' if the caller already knows it.
+    A bytearray (as returned by Phase 2) is extended in place; the insert only
+    moves the bytes after the insertion point instead of copying the document.
     """
-    mobile_id_set = set(MOBILE_COMPONENT_IDS)
-    style_marker = re.compile(r'/\* ---- (?:top|Section) styles ----- \*/')
-
-    head_end = html.find('</style></head>')
-    if head_end == -1:
-        print("[Phase 4] Could not find style/head boundary")
-        return html
-
-    head_content = html[:head_end]
-    body_content = html[head_end:]
-
-    markers = list(style_marker.finditer(head_content))
-
-    removed_blocks = 0
-    removed_rules_bytes = 0
-    removed_block_bytes = 0
-
-    # Process blocks in reverse order to maintain positions
-    changes = []  # (start, end, replacement_or_None)
 
-    for i, m in enumerate(markers):
-        block_start = m.start()
-        block_end = markers[i + 1].start() if i + 1 < len(markers) else len(head_content)
-        block_text = head_content[block_start:block_end]
-
-        # Extract all IDs in this block
-        ids_in_block = _extract_ids_from_css(block_text)
-        mobile_ids_in_block = ids_in_block & mobile_id_set
-        desktop_ids_in_block = ids_in_block - mobile_id_set
-
-        if not mobile_ids_in_block:
-            # No mobile IDs — skip entirely
-            continue
-
-        if not desktop_ids_in_block:
-            # Pure mobile block — remove entirely
-            changes.append((block_start, block_end, None))
-            removed_block_bytes += block_end - block_start
-            removed_blocks += 1
-        else:
-            # Mixed block — filter at rule level
-            filtered, bytes_removed = _filter_mobile_rules(block_text, mobile_id_set)
-            if bytes_removed > 0:
-                changes.append((block_start, block_end, filtered))
-                removed_rules_bytes += bytes_removed
-
-    # Apply changes in reverse order
-    for start, end, replacement in reversed(changes):
-        actual_start = start
-        if replacement is None:
-            # Full removal — also eat preceding newline
-            if actual_start > 0 and head_content[actual_start - 1] == '\n':
-                actual_start -= 1
-            head_content = head_content[:actual_start] + head_content[end:]
-        else:
-            head_content = head_content[:start] + replacement + head_content[end:]
-
-    html = head_content + body_content
-
-    total_removed = removed_block_bytes + removed_rules_bytes
-    print(f"[Phase 4] Removed {removed_blocks} pure-mobile CSS blocks ({removed_block_bytes:,} bytes)")
-    print(f"  + filtered mobile rules from mixed blocks ({removed_rules_bytes:,} bytes)")
-    print(f"  Total CSS removed: {total_removed:,} bytes")
-    return html
-
-
-def phase5_add_responsive_css(html):
-    """Phase 5: Inject responsive CSS overrides before </style></head>."""
-
-    insert_point = html.find('</style></head>')
+    insert_point = html.find(b'</style></head>') if head_end is None else head_end
     if insert_point == -1:
         print("[Phase 5] Could not find </style></head> insertion point")
         return html
 
-    html = html[:insert_point] + RESPONSIVE_CSS + html[insert_point:]
+    if not isinstance(html, bytearray):
+        html = bytearray(html)
+    html[insert_point:insert_point] = RESPONSIVE_CSS
     print(f"[Phase 5] Added responsive CSS overrides ({len(RESPONSIVE_CSS)} bytes)")
     return html
 
 
 def phase6_normalize_cta_links(html):
-    """Phase 6: Replace any remaining order_page_ URLs with order-page."""
+    """Phase 6: Replace any remaining order_page_ URLs with order-page.
+
+    The links are rewritten in place in the bytearray carried through from
+    Phase 2, so no second copy of the document is allocated.
+    """
+
+    cta_spans = []
+    count_after = 0
+    for m in _ORDER_PAGE_RE.finditer(html):
+        start = m.start() - len(_CTA_DOMAIN)
+        if start >= 0 and html[start:m.start()] == _CTA_DOMAIN:
+            cta_spans.append((start, m.end()))
+        else:
+            count_after += 1
+    replaced = len(cta_spans)
 
-    count_before = html.count('order_page_')
-    html = html.replace('1clickonboarding.com/order_page_', '1clickonboarding.com/order-page')
-    count_after = html.count('order_page_')
+    if cta_spans and not isinstance(html, bytearray):
+        html = bytearray(html)
+    # Back to front, so earlier offsets stay valid as the buffer shrinks
+    for start, end in reversed(cta_spans):
+        html[start:end] = b'1clickonboarding.com/order-page'
 
-    replaced = count_before - count_after
     print(f"[Phase 6] Normalized {replaced} CTA links (order_page_ → order-page)")
     if count_after > 0:
         print(f"  Note: {count_after} order_page_ references remain (may be in removed content)")
@@ -427,38 +296,53 @@ def verify(html):
     """Verify the merge results."""
     print("\n=== Verification ===")
 
+    # Tally every verified token in one scan of the document; the <body> tag
+    # is part of the same scan, so hits are known to be in the body without a
+    # separate search for it
+    in_body = False
+    still_present = set()
+    counts = dict.fromkeys(('section', 'desktop', 'mobile', 'order_underscore', 'order_dash', 'form'), 0)
+    for m in _VERIFY_RE.finditer(html):
+        kind = m.lastgroup
+        if kind == 'body':
+            in_body = True
+            continue
+        if kind == 'section' and m.group('section_id') in _REMOVED_SECTION_IDS:
+            still_present.add(m.group('section_id').decode())
+        if kind in ('desktop', 'mobile') and not in_body:
+            continue
+        counts[kind] += 1
+
     # Count sections
-    section_count = len(re.findall(r'id="section-[^"]+', html))
+    section_count = counts['section']
     print(f"Section count: {section_count} (target: 14)")
 
     # Check for mobile-only/desktop-only in body (kept intact, CSS override handles mobile)
-    body_start = html.find('<body>')
-    if body_start != -1:
-        body_html = html[body_start:]
-        desktop_in_body = body_html.count('desktop-only')
-        mobile_in_body = body_html.count('mobile-only')
+    if in_body:
+        desktop_in_body = counts['desktop']
+        mobile_in_body = counts['mobile']
         print(f"desktop-only in body: {desktop_in_body} (preserved, CSS override in Phase 5)")
         print(f"mobile-only in body: {mobile_in_body} (preserved)")
 
     # Check CTA links
-    order_page_underscore = html.count('order_page_')
-    order_page_dash = html.count('order-page')
+    order_page_underscore = counts['order_underscore']
+    order_page_dash = counts['order_dash']
     print(f"order_page_ links: {order_page_underscore} (target: 0)")
     print(f"order-page links: {order_page_dash}")
 
     # Check GHL form
-    ghl_form_count = html.count('JfoVUQbTOONUDr9Jraq7')
+    ghl_form_count = counts['form']
     print(f"GHL email form iframes: {ghl_form_count}")
 
     # File size
-    size = len(html.encode('utf-8'))
+    size = len(html)
     original = os.path.getsize(BACKUP_PATH)
     reduction = (1 - size / original) * 100
     print(f"\nFile size: {size:,} bytes (was {original:,}, -{reduction:.1f}%)")
 
-    # Check for removed section IDs (should be 0)
+    # Check for removed section IDs (should be 0), found by the same scan
     for sid in MOBILE_SECTIONS_TO_REMOVE:
-        if f'id="{sid}"' in html:
+        if sid in still_present:
             print(f"  ERROR: {sid} still present in HTML!")
 
 
@@ -470,33 +354,55 @@ def main():
     # Phase 1: Backup
     phase1_backup()
 
-    # Read the file
-    with open(INDEX_PATH, 'r', encoding='utf-8') as f:
-        html = f.read()
+    # Map the file read-only; Phase 2 scans the mapping directly and returns
+    # the only working copy, a bytearray that the default Phases 5 and 6 edit
+    # in place, so at most one copy of the HTML is held alongside the mapping
+    with open(INDEX_PATH, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        original_size = len(mm)
 
-    original_size = len(html.encode('utf-8'))
+        # Phase 2: Remove mobile sections
+        html = phase2_remove_mobile_sections(mm)
 
-    # Phase 2: Remove mobile sections
-    html = phase2_remove_mobile_sections(html)
-
-    # Phase 3: SKIPPED — keeping desktop-only/mobile-only classes intact
+    # Phase 3: SKIPPED by default — keeping desktop-only/mobile-only classes intact
     # entry.css uses these for responsive visibility. Instead of stripping,
     # Phase 5 adds a CSS override to show desktop-only elements on mobile.
-    print("[Phase 3] Skipped (classes preserved, CSS override in Phase 5)")
+    if ENABLE_CLASS_STRIP:
+        html = importlib.import_module("dead_css").phase3_strip_desktop_only(html)
+    else:
+        print("[Phase 3] Skipped (classes preserved, CSS override in Phase 5)")
+
+    # Locate the style/head boundary once; Phases 4 and 5 both work against it
+    head_end = html.find(b'</style></head>')
 
-    # Phase 4: SKIPPED — dead CSS doesn't affect rendering, only file size.
+    # Phase 4: SKIPPED by default — dead CSS doesn't affect rendering, only file size.
     # Removing CSS blocks risks breaking :root variable cascade and desktop styling.
-    print("[Phase 4] Skipped (dead CSS preserved for layout safety)")
+    if ENABLE_DEAD_CSS_STRIP:
+        size_before = len(html)
+        html = importlib.import_module("dead_css").phase4_remove_dead_css(html, head_end)
+        if head_end != -1:
+            # Phase 4 only edits the head, so the boundary moves by the size delta
+            head_end += len(html) - size_before
+    else:
+        print("[Phase 4] Skipped (dead CSS preserved for layout safety)")
 
     # Phase 5: Add responsive CSS (includes .desktop-only visibility override)
-    html = phase5_add_responsive_css(html)
+    html = phase5_add_responsive_css(html, head_end)
 
     # Phase 6: Normalize CTA links
     html = phase6_normalize_cta_links(html)
 
-    # Write output
-    with open(INDEX_PATH, 'w', encoding='utf-8') as f:
-        f.write(html)
+    # Write output straight to a file descriptor, bypassing the io buffer layer,
+    # then swap it into place so index.html is never left half-written
+    tmp_path = INDEX_PATH + '.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        view = memoryview(html)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    shutil.copymode(INDEX_PATH, tmp_path)
+    os.replace(tmp_path, INDEX_PATH)
 
     # Verify
     verify(html)
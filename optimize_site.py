@@ -8,15 +8,32 @@ Phases:
   4. Image optimization (PNG→WebP, lazy loading)
   1. CTA deduplication (20 buy boxes → shared template)
   2. Restore email opt-in GHL iframes
+  6. Precompress HTML/CSS (.gz, plus .br when brotli is installed)
 
 Run from: 1clickonboarding-clean/
 """
 
 import os
+import gzip
 import re
 import shutil
 import subprocess
 import sys
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
+
+from html_regex import DIV_TAG_STR_RE
+
+try:
+    from PIL import Image  # optional: encodes WebP in-process via libwebp
+except ImportError:
+    Image = None
+
+try:
+    import brotli  # optional: adds .br siblings next to the .gz ones
+except ImportError:
+    brotli = None
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 INDEX_PATH = os.path.join(BASE_DIR, "index.html")
@@ -25,11 +42,15 @@ CSS_DIR = os.path.join(BASE_DIR, "css")
 FONTS_DIR = os.path.join(BASE_DIR, "fonts")
 IMAGES_DIR = os.path.join(BASE_DIR, "images")
 
+# Buffer size for whole-file reads and writes, so each file moves in a few
+# large syscalls rather than many 8 KiB ones
+IO_BUFFER_SIZE = 256 * 1024
+
 
 def backup_file(src, dst):
     """Create a backup if it doesn't already exist."""
     if not os.path.exists(dst):
-        shutil.copy2(src, dst)
+        shutil.copyfile(src, dst)
         print(f"  Backup created: {os.path.basename(dst)}")
     else:
         print(f"  Backup already exists: {os.path.basename(dst)}")
@@ -39,49 +60,108 @@ def file_size_kb(path):
     return os.path.getsize(path) / 1024
 
 
-# ─────────────────────────────────────────────
-# Phase 5: HTML Cleanup
-# ─────────────────────────────────────────────
-def phase5_html_cleanup(html):
-    """Remove clearfix divs, nuxt route announcer, stickyLength div, commented banners."""
-    original_len = len(html)
+def remove_entries(entries):
+    """Unlink scandir entries back to back, after the directory walk is done.
 
-    # 1. Remove empty clearfix divs (keep CSS definitions)
-    html = re.sub(r'\s*<div class="clearfix"></div>\s*', '\n', html)
+    Sorted by inode number (free from scandir) for better locality on disk.
+    """
+    for entry in sorted(entries, key=lambda e: e.inode()):
+        os.unlink(entry.path)
 
-    # 2. Remove nuxt route announcer span
-    html = re.sub(
-        r'<span class="nuxt-route-announcer"[^>]*>.*?</span></span>',
-        '',
-        html,
-        flags=re.DOTALL
-    )
 
-    # 3. Remove stickyLength div
-    html = re.sub(
-        r'<div id="stickyLength"[^>]*>\s*</div>',
-        '',
-        html
+def dir_size_kb(path):
+    """Total size of the non-hidden entries directly inside path."""
+    with os.scandir(path) as entries:
+        return sum(e.stat().st_size for e in entries if not e.name.startswith('.')) / 1024
+
+
+# ─────────────────────────────────────────────
+# Phase 3: Font Optimization
+# ─────────────────────────────────────────────
+# @font-face rules kept in the trimmed google-fonts.css:
+# (family, weight, extra descriptors, local woff2 file)
+_KEPT_FONT_FACES = [
+    ("Kalam", 300, "", "YA9Qr0Wd4kDdMtD6GjLMkiQqtbGs.woff2"),   # Kalam 300 - latin
+    ("Kalam", 400, "", "YA9dr0Wd4kDdMthROCfhsCkA.woff2"),       # Kalam 400 - latin
+    ("Kalam", 700, "", "YA9Qr0Wd4kDdMtDqHTLMkiQqtbGs.woff2"),   # Kalam 700 - latin
+    ("Roboto", 400, "font-stretch:100%;", "KFO5CnqEu92Fr1Mu53ZEC9_Vu3r1gIhOszmkBnkaSTbQWg.woff2"),  # Roboto 400 normal - latin
+]
+
+# Google's "latin" subset, shared by all four rules
+_LATIN_UNICODE_RANGE = (
+    "U+0000-00FF,U+0131,U+0152-0153,U+02BB-02BC,U+02C6,U+02DA,U+02DC,U+0304,"
+    "U+0308,U+0329,U+2000-206F,U+20AC,U+2122,U+2191,U+2193,U+2212,U+2215,"
+    "U+FEFF,U+FFFD"
+)
+
+
+# U+0000-00FF, the first part of _LATIN_UNICODE_RANGE: always covered, so any
+# Latin-1 character added to a page later still renders in the web font
+_LATIN1_CODEPOINTS = range(0x0000, 0x0100)
+
+
+def _unicode_range(texts):
+    """unicode-range value covering every character in texts plus all of Latin-1.
+
+    Character references (&copy;, &#8217;) are decoded first so the characters
+    they render are covered too. Private-use code points (Font Awesome icon
+    glyphs) are left out; they never render in a Google font.
+    """
+    codepoints = set(_LATIN1_CODEPOINTS)
+    for text in texts:
+        codepoints.update(
+            ord(ch) for ch in set(unescape(text))
+            if unicodedata.category(ch) != "Co"
+        )
+    codepoints = sorted(codepoints)
+    ranges = []
+    start = prev = codepoints[0]
+    for cp in codepoints[1:]:
+        if cp != prev + 1:
+            ranges.append((start, prev))
+            start = cp
+        prev = cp
+    ranges.append((start, prev))
+    return ",".join(
+        f"U+{lo:04X}" if lo == hi else f"U+{lo:04X}-{hi:04X}"
+        for lo, hi in ranges
     )
 
-    # 4. Remove commented-out banner HTML blocks
-    html = re.sub(
-        r'\s*<!--\s*\n\s*<div class="top_right_banner_outer">.*?-->\s*',
-        '\n',
-        html,
-        flags=re.DOTALL
+
+def _other_google_fonts_pages():
+    """Text of every page besides index.html that links css/google-fonts.css.
+
+    Bytes that aren't valid UTF-8 are replaced rather than aborting the phase.
+    """
+    pages = []
+    for entry in os.scandir(BASE_DIR):
+        if not entry.name.endswith(".html") or entry.path == INDEX_PATH:
+            continue
+        with open(entry.path, "r", encoding="utf-8", errors="replace",
+                  buffering=IO_BUFFER_SIZE) as f:
+            text = f.read()
+        if "css/google-fonts.css" in text:
+            pages.append(text)
+    return pages
+
+
+def _font_face_css(unicode_range):
+    """The kept @font-face rules, minified one per line."""
+    return "".join(
+        f"@font-face{{font-family:'{family}';font-style:normal;font-weight:{weight};{extra}"
+        f"font-display:swap;src:url(../fonts/{woff2}) format('woff2');unicode-range:{unicode_range}}}\n"
+        for family, weight, extra, woff2 in _KEPT_FONT_FACES
     )
 
-    saved = original_len - len(html)
-    print(f"  HTML cleanup saved {saved:,} bytes ({saved/1024:.1f} KB)")
-    return html
 
+def phase3a_trim_google_fonts(html=None):
+    """Trim google-fonts.css to only the fonts actually used: Roboto 400 normal + Kalam 300/400/700.
 
-# ─────────────────────────────────────────────
-# Phase 3: Font Optimization
-# ─────────────────────────────────────────────
-def phase3a_trim_google_fonts():
-    """Trim google-fonts.css to only the fonts actually used: Roboto 400 normal + Kalam 300/400/700."""
+    When the page HTML is given, each rule's unicode-range is narrowed to the
+    characters used by it and by every other page linking the same
+    stylesheet (plus all of Latin-1), so browsers can skip a font file that
+    no text needs; otherwise Google's full latin subset is kept.
+    """
     gf_path = os.path.join(CSS_DIR, "google-fonts.css")
     backup_file(gf_path, gf_path + ".pre-optimize")
 
@@ -94,52 +174,37 @@ def phase3a_trim_google_fonts():
     # All font files are already local (.woff2), referenced via ../fonts/
 
     # Build minimal google-fonts.css with only needed declarations
-    minimal_css = """/* Kalam 300 - latin */
-@font-face {
-  font-family: 'Kalam';
-  font-style: normal;
-  font-weight: 300;
-  font-display: swap;
-  src: url(../fonts/YA9Qr0Wd4kDdMtD6GjLMkiQqtbGs.woff2) format('woff2');
-  unicode-range: U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, U+0304, U+0308, U+0329, U+2000-206F, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD;
-}
-/* Kalam 400 - latin */
-@font-face {
-  font-family: 'Kalam';
-  font-style: normal;
-  font-weight: 400;
-  font-display: swap;
-  src: url(../fonts/YA9dr0Wd4kDdMthROCfhsCkA.woff2) format('woff2');
-  unicode-range: U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, U+0304, U+0308, U+0329, U+2000-206F, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD;
-}
-/* Kalam 700 - latin */
-@font-face {
-  font-family: 'Kalam';
-  font-style: normal;
-  font-weight: 700;
-  font-display: swap;
-  src: url(../fonts/YA9Qr0Wd4kDdMtDqHTLMkiQqtbGs.woff2) format('woff2');
-  unicode-range: U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, U+0304, U+0308, U+0329, U+2000-206F, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD;
-}
-/* Roboto 400 normal - latin */
-@font-face {
-  font-family: 'Roboto';
-  font-style: normal;
-  font-weight: 400;
-  font-stretch: 100%;
-  font-display: swap;
-  src: url(../fonts/KFO5CnqEu92Fr1Mu53ZEC9_Vu3r1gIhOszmkBnkaSTbQWg.woff2) format('woff2');
-  unicode-range: U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, U+0304, U+0308, U+0329, U+2000-206F, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD;
-}
-"""
+    if html is None:
+        unicode_range = _LATIN_UNICODE_RANGE
+    else:
+        unicode_range = _unicode_range([html, *_other_google_fonts_pages()])
+    minimal_css = _font_face_css(unicode_range)
 
-    with open(gf_path, "w") as f:
+    with open(gf_path, "w", buffering=IO_BUFFER_SIZE) as f:
         f.write(minimal_css)
 
     new_size = file_size_kb(gf_path)
     print(f"  google-fonts.css: {old_size:.1f} KB → {new_size:.1f} KB (saved {old_size - new_size:.1f} KB)")
 
 
+# FontAwesome @font-face src lists with every legacy format (entry.css is
+# minified), mapped to their woff2-only replacements. These are fixed strings,
+# so plain str.replace does the job without a regex.
+_FA_LEGACY_SRC = (
+    'src:url(../fonts/{name}.eot);'
+    'src:url(../fonts/{name}.eot#iefix) format("embedded-opentype"),'
+    'url(../fonts/{name}.woff2) format("woff2"),'
+    'url(../fonts/{name}.woff) format("woff"),'
+    'url(../fonts/{name}.ttf) format("truetype"),'
+    'url(../images/{name}.svg#fontawesome) format("svg")'
+)
+_FA_WOFF2_SRC = 'src:url(../fonts/{name}.woff2) format("woff2")'
+_FA_SRC_REPLACEMENTS = {
+    _FA_LEGACY_SRC.format(name=name): _FA_WOFF2_SRC.format(name=name)
+    for name in ('fa-regular-400', 'fa-solid-900', 'fa-brands-400')
+}
+
+
 def phase3b_remove_legacy_font_formats():
     """Remove .eot, .ttf, .woff font files (keep only .woff2).
     Also remove FontAwesome SVG files from images/ and update entry.css."""
@@ -148,13 +213,12 @@ def phase3b_remove_legacy_font_formats():
     saved_bytes = 0
 
     # Remove legacy font files
-    for f in os.listdir(FONTS_DIR):
-        if f.endswith(('.eot', '.ttf', '.woff')) and not f.endswith('.woff2'):
-            path = os.path.join(FONTS_DIR, f)
-            size = os.path.getsize(path)
-            os.remove(path)
-            removed_files.append(f)
-            saved_bytes += size
+    with os.scandir(FONTS_DIR) as entries:
+        legacy = [e for e in entries if e.name.endswith(('.eot', '.ttf', '.woff'))]
+    for entry in legacy:
+        removed_files.append(entry.name)
+        saved_bytes += entry.stat().st_size
+    remove_entries(legacy)
 
     # Remove FontAwesome SVG files from images/
     fa_svgs = ['fa-solid-900.svg', 'fa-brands-400.svg', 'fa-regular-400.svg']
@@ -162,7 +226,7 @@ def phase3b_remove_legacy_font_formats():
         path = os.path.join(IMAGES_DIR, f)
         if os.path.exists(path):
             size = os.path.getsize(path)
-            os.remove(path)
+            os.unlink(path)
             removed_files.append(f)
             saved_bytes += size
 
@@ -172,50 +236,20 @@ def phase3b_remove_legacy_font_formats():
     entry_path = os.path.join(CSS_DIR, "entry.IgpDOq8p.css")
     backup_file(entry_path, entry_path + ".pre-optimize")
 
-    with open(entry_path, "r") as f:
-        css = f.read()
-
-    # Replace each FontAwesome @font-face with woff2-only version
-    # Pattern: @font-face{...font-family:Font Awesome...src:url(...)...}
-    # The CSS is minified, so we need to match carefully
-
-    # fa-regular-400
-    css = re.sub(
-        r'src:url\(\.\./fonts/fa-regular-400\.eot\);'
-        r'src:url\(\.\./fonts/fa-regular-400\.eot#iefix\) format\("embedded-opentype"\),'
-        r'url\(\.\./fonts/fa-regular-400\.woff2\) format\("woff2"\),'
-        r'url\(\.\./fonts/fa-regular-400\.woff\) format\("woff"\),'
-        r'url\(\.\./fonts/fa-regular-400\.ttf\) format\("truetype"\),'
-        r'url\(\.\./images/fa-regular-400\.svg#fontawesome\) format\("svg"\)',
-        r'src:url(../fonts/fa-regular-400.woff2) format("woff2")',
-        css
-    )
+    with open(entry_path, "r", buffering=IO_BUFFER_SIZE) as f:
+        original_css = f.read()
 
-    # fa-solid-900
-    css = re.sub(
-        r'src:url\(\.\./fonts/fa-solid-900\.eot\);'
-        r'src:url\(\.\./fonts/fa-solid-900\.eot#iefix\) format\("embedded-opentype"\),'
-        r'url\(\.\./fonts/fa-solid-900\.woff2\) format\("woff2"\),'
-        r'url\(\.\./fonts/fa-solid-900\.woff\) format\("woff"\),'
-        r'url\(\.\./fonts/fa-solid-900\.ttf\) format\("truetype"\),'
-        r'url\(\.\./images/fa-solid-900\.svg#fontawesome\) format\("svg"\)',
-        r'src:url(../fonts/fa-solid-900.woff2) format("woff2")',
-        css
-    )
+    # Replace each FontAwesome @font-face src with the woff2-only version
+    css = original_css
+    for legacy_src, woff2_src in _FA_SRC_REPLACEMENTS.items():
+        css = css.replace(legacy_src, woff2_src)
 
-    # fa-brands-400
-    css = re.sub(
-        r'src:url\(\.\./fonts/fa-brands-400\.eot\);'
-        r'src:url\(\.\./fonts/fa-brands-400\.eot#iefix\) format\("embedded-opentype"\),'
-        r'url\(\.\./fonts/fa-brands-400\.woff2\) format\("woff2"\),'
-        r'url\(\.\./fonts/fa-brands-400\.woff\) format\("woff"\),'
-        r'url\(\.\./fonts/fa-brands-400\.ttf\) format\("truetype"\),'
-        r'url\(\.\./images/fa-brands-400\.svg#fontawesome\) format\("svg"\)',
-        r'src:url(../fonts/fa-brands-400.woff2) format("woff2")',
-        css
-    )
+    # On a re-run the sources are already woff2-only; leave the file alone
+    if css == original_css:
+        print(f"  entry.css already uses woff2 only for FontAwesome (unchanged)")
+        return
 
-    with open(entry_path, "w") as f:
+    with open(entry_path, "w", buffering=IO_BUFFER_SIZE) as f:
         f.write(css)
 
     print(f"  Updated entry.css: FontAwesome now uses woff2 only")
@@ -236,15 +270,11 @@ def phase3c_remove_unused_font_files():
         'fa-regular-400.woff2',
     }
 
-    removed = 0
-    saved = 0
-    for f in os.listdir(FONTS_DIR):
-        if f.endswith('.woff2') and f not in keep_fonts:
-            path = os.path.join(FONTS_DIR, f)
-            size = os.path.getsize(path)
-            os.remove(path)
-            removed += 1
-            saved += size
+    with os.scandir(FONTS_DIR) as entries:
+        unused = [e for e in entries if e.name.endswith('.woff2') and e.name not in keep_fonts]
+    removed = len(unused)
+    saved = sum(e.stat().st_size for e in unused)
+    remove_entries(unused)
 
     if removed:
         print(f"  Removed {removed} unused Google Font woff2 files ({saved/1024:.0f} KB)")
@@ -253,81 +283,133 @@ def phase3c_remove_unused_font_files():
 # ─────────────────────────────────────────────
 # Phase 4: Image Optimization
 # ─────────────────────────────────────────────
+def _convert_to_webp(png_path, webp_path):
+    """Convert one PNG to WebP; return None on success or the error text."""
+    # Prefer Pillow, which saves a fork/exec per image; method 4 is cwebp's
+    # default effort level. Fall back to cwebp if Pillow is missing or was
+    # built without WebP support.
+    if Image is not None:
+        try:
+            with Image.open(png_path) as img:
+                img.save(webp_path, 'WEBP', quality=80, method=4)
+            return None
+        except (OSError, KeyError, ValueError):
+            pass
+
+    # Convert using cwebp (quality 80 is good for photos)
+    result = subprocess.run(
+        ['cwebp', '-q', '80', png_path, '-o', webp_path],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return result.stderr
+    return None
+
+
 def phase4a_convert_large_pngs_to_webp(html):
-    """Convert the 3 largest PNGs to WebP using cwebp, update HTML references."""
+    """Convert the 3 largest PNGs to WebP (Pillow or cwebp), update HTML references."""
     large_pngs = [
         '657fce865a248f7b6681373a.png',  # 360 KB
         '657fd1f65a248fa9d6813bbf.png',  # 360 KB
         '65644daabd24ba5e7d633716.png',  # 272 KB
     ]
 
-    total_saved = 0
+    jobs = []
     for png_name in large_pngs:
         png_path = os.path.join(IMAGES_DIR, png_name)
         if not os.path.exists(png_path):
             print(f"  Skipping {png_name} (not found)")
             continue
-
         webp_name = png_name.replace('.png', '.webp')
-        webp_path = os.path.join(IMAGES_DIR, webp_name)
+        jobs.append((png_name, png_path, webp_name, os.path.join(IMAGES_DIR, webp_name)))
 
-        old_size = file_size_kb(png_path)
+    # Run the conversions side by side; threads either wait on a cwebp child
+    # or sit in libwebp with the GIL released. Results come back in list order,
+    # which keeps the log and the HTML rewrites deterministic.
+    with ThreadPoolExecutor(max_workers=max(len(jobs), 1)) as pool:
+        errors = list(pool.map(_convert_to_webp, [job[1] for job in jobs], [job[3] for job in jobs]))
 
-        # Convert using cwebp (quality 80 is good for photos)
-        result = subprocess.run(
-            ['cwebp', '-q', '80', png_path, '-o', webp_path],
-            capture_output=True, text=True
-        )
-        if result.returncode != 0:
-            print(f"  Failed to convert {png_name}: {result.stderr}")
+    total_saved = 0
+    renamed = {}
+    converted = []
+    for (png_name, png_path, webp_name, webp_path), error in zip(jobs, errors):
+        if error is not None:
+            print(f"  Failed to convert {png_name}: {error}")
             continue
 
+        old_size = file_size_kb(png_path)
         new_size = file_size_kb(webp_path)
         saved = old_size - new_size
         total_saved += saved
 
-        # Update HTML references
-        html = html.replace(f'images/{png_name}', f'images/{webp_name}')
-
-        # Remove original PNG
-        os.remove(png_path)
+        renamed[f'images/{png_name}'] = f'images/{webp_name}'
+        converted.append(png_path)
         print(f"  {png_name}: {old_size:.0f} KB → {webp_name}: {new_size:.0f} KB (saved {saved:.0f} KB)")
 
-    print(f"  Total image savings: {total_saved:.0f} KB")
-    return html
+    # Remove original PNGs
+    for png_path in converted:
+        os.unlink(png_path)
 
+    # Update HTML references for every converted image in one pass
+    if renamed:
+        pattern = re.compile('|'.join(map(re.escape, renamed)))
+        html = pattern.sub(lambda match: renamed[match.group(0)], html)
 
-def phase4b_add_lazy_loading(html):
-    """Add loading='lazy' to all images except the first few above-fold ones."""
-    # First, find all img tags
-    img_pattern = re.compile(r'<img\s', re.IGNORECASE)
-    matches = list(img_pattern.finditer(html))
-    total = len(matches)
+    print(f"  Total image savings: {total_saved:.0f} KB")
+    return html
 
-    # Count how many already have loading="lazy"
-    already_lazy = len(re.findall(r'loading="lazy"', html))
 
-    # Add loading="lazy" to img tags that don't have it
-    # Skip the first 5 images (above-fold: hero, product shot, logo, etc.)
+# ─────────────────────────────────────────────
+# Phases 5 + 4b: HTML Cleanup and Lazy Loading
+# ─────────────────────────────────────────────
+# The four cleanup targets and the <img ...> tag in one alternation, so the
+# HTML is scanned once. Clearfix divs and commented-out banners (with the
+# whitespace around them) become a newline; the nuxt announcer and
+# stickyLength div are dropped. img_attrs is the attribute text of an img tag
+# (matched case-insensitively).
+_CLEANUP_AND_IMG_RE = re.compile(
+    r'(?P<newline>\s*<div class="clearfix"></div>\s*'
+    r'|\s*<!--\s*\n\s*<div class="top_right_banner_outer">.*?-->\s*)'
+    r'|<span class="nuxt-route-announcer"[^>]*>.*?</span></span>'
+    r'|<div id="stickyLength"[^>]*>\s*</div>'
+    r'|(?i:<img\s(?P<img_attrs>[^>]*)>)',
+    re.DOTALL
+)
+
+
+def cleanup_and_lazy_load(html):
+    """Remove clearfix divs, nuxt route announcer, stickyLength div and
+    commented banners, and add loading="lazy" to images past the first five
+    above-fold ones, in a single pass.
+
+    Images inside removed blocks (e.g. commented-out banners) are consumed by
+    the cleanup match and never counted. Phase 4a only renames image files, so
+    lazy loading before it is safe.
+    """
+    original_len = len(html)
     count = 0
     added = 0
+    already_lazy = 0
 
-    def add_lazy(match):
-        nonlocal count, added
+    def dispatch(match):
+        nonlocal already_lazy, count, added
+        attrs = match.group('img_attrs')
+        if attrs is None:
+            return '\n' if match.group('newline') is not None else ''
         count += 1
-        tag = match.group(0)
-        # Skip first 5 images (above-fold)
-        if count <= 5:
-            return tag
-        # Skip if already has loading attribute
-        full_tag_end = html.index('>', match.start()) + 1
-        full_tag = html[match.start():full_tag_end]
-        if 'loading=' in full_tag:
-            return tag
+        if 'loading="lazy"' in attrs:
+            already_lazy += 1
+        # Skip first 5 images (above-fold) and any with a loading attribute
+        if count <= 5 or 'loading=' in attrs:
+            return match.group(0)
         added += 1
-        return '<img loading="lazy" '
+        return f'<img loading="lazy" {attrs}>'
 
-    html = img_pattern.sub(add_lazy, html)
+    html = _CLEANUP_AND_IMG_RE.sub(dispatch, html)
+
+    # Lazy-loading adds bytes, so report the cleanup savings on their own
+    saved = original_len - len(html) + added * len('loading="lazy" ')
+    print(f"  HTML cleanup saved {saved:,} bytes ({saved/1024:.1f} KB)")
     print(f"  Added loading='lazy' to {added} images (skipped first 5 above-fold, {already_lazy} already lazy)")
     return html
 
@@ -335,28 +417,45 @@ def phase4b_add_lazy_loading(html):
 # ─────────────────────────────────────────────
 # Phase 1: CTA Deduplication
 # ─────────────────────────────────────────────
-def phase1_deduplicate_ctas(html):
-    """Replace 20 near-identical CTA buy boxes with a shared CSS class approach.
-
-    Each CTA block follows this pattern:
-      <div class="top_right_sec big_cta">
-        <p class="toptxt">DIGITAL DOWNLOAD NOW AVAILABLE</p>
-        <div class="inner_white_bkg">
-          [product image, price, CTA button, guarantee badge, checkout image]
-        </div>
-      </div>
-
-    They differ only by:
-      - Unique GHL element IDs in parent wrappers (which we don't need)
-      - Some have commented-out banner HTML (already cleaned in Phase 5)
-      - Minor whitespace differences
-
-    Strategy: Replace each CTA block's inner content with canonical template HTML.
-    This makes all 20 identical, so future edits only need to change the template.
+# CTA blocks: a <div class="top_right_sec big_cta"> whose first child is the
+# "DIGITAL DOWNLOAD NOW AVAILABLE" heading, running to that div's own </div>
+_CTA_OPEN_TAG = '<div class="top_right_sec big_cta">'
+_CTA_HEADING_RE = re.compile(r'\s*<p class="toptxt">DIGITAL DOWNLOAD NOW AVAILABLE</p>')
+
+def _find_cta_blocks(html):
+    """Return (start, end) spans of the CTA buy boxes, in document order.
+
+    Each block is closed by balancing <div>/</div> tags from its opening tag
+    (with the shared html_regex tokenizer), so the span is the whole element
+    however its closing tags are spaced. Only phase1_deduplicate_ctas uses
+    this, and main() currently skips that phase.
     """
-
-    # Define the canonical CTA template (based on the most complete version)
-    canonical_cta_inner = '''<p class="toptxt">DIGITAL DOWNLOAD NOW AVAILABLE</p>
+    spans = []
+    pos = html.find(_CTA_OPEN_TAG)
+    while pos != -1:
+        content_start = pos + len(_CTA_OPEN_TAG)
+        next_search = content_start
+        if _CTA_HEADING_RE.match(html, content_start):
+            depth = 1
+            for m in DIV_TAG_STR_RE.finditer(html, content_start):
+                if m.group(2):
+                    depth -= 1
+                    if depth == 0:
+                        spans.append((pos, m.end()))
+                        next_search = m.end()
+                        break
+                elif m.group(3):
+                    depth += 1
+            else:
+                print(f"  WARNING: Could not find matching </div> for CTA at offset {pos:,}")
+                break
+        pos = html.find(_CTA_OPEN_TAG, next_search)
+    return spans
+
+
+# Canonical CTA template (based on the most complete version); every block
+# is replaced with the same markup, so the full replacement is built once
+_CANONICAL_CTA_INNER = '''<p class="toptxt">DIGITAL DOWNLOAD NOW AVAILABLE</p>
 						<div class="inner_white_bkg">
 							<div style="display: inline-block; height: auto; margin-bottom: 0px !important; margin-top: 0px !important;">
 								<img class="product_image" src="images/656b079ee33f7cbc7b2c7467.png" loading="lazy">
@@ -380,38 +479,44 @@ def phase1_deduplicate_ctas(html):
 								<img class="secure_checkout_img" style="display: inline-block; vertical-align: middle;width: 100%;" alt="secure_checkout_img" src="images/c6c86cdd-f716-4fba-8829-264762bd7588.jpg" loading="lazy">
 							</div>
 						</div>'''
+_CTA_REPLACEMENT = f'{_CTA_OPEN_TAG}\n{_CANONICAL_CTA_INNER}\n\t\t\t\t\t</div>'
 
-    # Match CTA blocks: starts with <div class="top_right_sec big_cta"> and ends with the closing structure
-    # The pattern needs to match the entire CTA content block
-    cta_pattern = re.compile(
-        r'(<div class="top_right_sec big_cta">)\s*'
-        r'<p class="toptxt">DIGITAL DOWNLOAD NOW AVAILABLE</p>'
-        r'.*?'  # All the inner content
-        r'(</div>\s*</div>\s*</div>)',  # Closing tags for inner_white_bkg + top_right_sec wrapper
-        re.DOTALL
-    )
 
-    # Find all matches first to count
-    matches = list(cta_pattern.finditer(html))
-    print(f"  Found {len(matches)} CTA buy boxes")
+def phase1_deduplicate_ctas(html):
+    """Replace 20 near-identical CTA buy boxes with a shared CSS class approach.
 
-    if len(matches) < 15:
-        print(f"  WARNING: Expected ~20 CTAs, found {len(matches)}. Skipping dedup to be safe.")
+    Each CTA block follows this pattern:
+      <div class="top_right_sec big_cta">
+        <p class="toptxt">DIGITAL DOWNLOAD NOW AVAILABLE</p>
+        <div class="inner_white_bkg">
+          [product image, price, CTA button, guarantee badge, checkout image]
+        </div>
+      </div>
+
+    They differ only by:
+      - Unique GHL element IDs in parent wrappers (which we don't need)
+      - Some have commented-out banner HTML (already cleaned in Phase 5)
+      - Minor whitespace differences
+
+    Strategy: Replace each CTA block's inner content with canonical template HTML.
+    This makes all 20 identical, so future edits only need to change the template.
+    """
+    spans = _find_cta_blocks(html)
+    print(f"  Found {len(spans)} CTA buy boxes")
+
+    if len(spans) < 15:
+        print(f"  WARNING: Expected ~20 CTAs, found {len(spans)}. Skipping dedup to be safe.")
         return html
 
-    # Replace each match with canonical template
-    # Work backwards to preserve positions
-    for match in reversed(matches):
-        start = match.start()
-        end = match.end()
-        # Reconstruct: opening div + canonical content + closing divs
-        replacement = f'<div class="top_right_sec big_cta">\n{canonical_cta_inner}\n\t\t\t\t\t</div>'
-        # We need to figure out how many closing divs the match captured
-        # The match ends with </div></div></div> — 3 closing divs
-        # But our CTA structure is: top_right_sec > inner_white_bkg > content
-        # So we need: close inner_white_bkg (1) + close text-center mt10 wrapper + close top_right_sec
-        # Actually let's be more precise — replace just the content between the opening and closing
-        html = html[:start] + replacement + html[end:]
+    # Stitch the untouched stretches between blocks together with the
+    # shared replacement in a single join
+    pieces = []
+    last = 0
+    for start, end in spans:
+        pieces += [html[last:start], _CTA_REPLACEMENT]
+        last = end
+    pieces.append(html[last:])
+    html = ''.join(pieces)
 
     # Verify
     remaining = html.count('DIGITAL DOWNLOAD NOW AVAILABLE')
@@ -427,7 +532,7 @@ def phase2_restore_email_optin(html):
     """No-op: iframe is now included in the canonical CTA template (phase1).
 
     Previously this inserted a .cta-email-form wrapper with the GHL iframe
-    after phase1 ran. Now phase1's canonical_cta_inner already contains the
+    after phase1 ran. Now _CANONICAL_CTA_INNER already contains the
     iframe with original GHL attributes (height:188px, data-height="432", etc.),
     so this step is no longer needed.
     """
@@ -435,6 +540,42 @@ def phase2_restore_email_optin(html):
     return html
 
 
+# ─────────────────────────────────────────────
+# Phase 6: Precompression
+# ─────────────────────────────────────────────
+def phase6_precompress():
+    """Write .gz (and .br, if brotli is installed) next to the HTML and CSS.
+
+    Lets the web server send the precompressed files as-is instead of
+    compressing on every request, e.g. in nginx:
+        gzip_static on;
+        brotli_static on;   # ngx_brotli module
+    """
+    paths = [
+        INDEX_PATH,
+        os.path.join(CSS_DIR, "google-fonts.css"),
+        os.path.join(CSS_DIR, "entry.IgpDOq8p.css"),
+    ]
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+
+        outputs = [(".gz", gzip.compress(data, compresslevel=9))]
+        if brotli is not None:
+            outputs.append((".br", brotli.compress(data, quality=11)))
+
+        for ext, compressed in outputs:
+            with open(path + ext, "wb") as f:
+                f.write(compressed)
+        sizes = ", ".join(f"{ext} {len(compressed)/1024:.1f} KB" for ext, compressed in outputs)
+        print(f"  {os.path.basename(path)}: {len(data)/1024:.1f} KB → {sizes}")
+
+    if brotli is None:
+        print("  brotli not installed — wrote .gz only")
+
+
 # ─────────────────────────────────────────────
 # Main
 # ─────────────────────────────────────────────
@@ -445,14 +586,8 @@ def main():
 
     # Record original sizes
     original_html_size = file_size_kb(INDEX_PATH)
-    original_fonts_size = sum(
-        os.path.getsize(os.path.join(FONTS_DIR, f))
-        for f in os.listdir(FONTS_DIR) if not f.startswith('.')
-    ) / 1024
-    original_images_size = sum(
-        os.path.getsize(os.path.join(IMAGES_DIR, f))
-        for f in os.listdir(IMAGES_DIR) if not f.startswith('.')
-    ) / 1024
+    original_fonts_size = dir_size_kb(FONTS_DIR)
+    original_images_size = dir_size_kb(IMAGES_DIR)
 
     print(f"\nOriginal sizes:")
     print(f"  HTML:   {original_html_size:.0f} KB")
@@ -464,20 +599,20 @@ def main():
     backup_file(INDEX_PATH, BACKUP_PATH)
 
     # Read HTML
-    with open(INDEX_PATH, "r", encoding="utf-8") as f:
+    with open(INDEX_PATH, "r", encoding="utf-8", buffering=IO_BUFFER_SIZE) as f:
         html = f.read()
 
     # Phase 5: HTML Cleanup
     print(f"\n{'─'*60}")
-    print("Phase 5: HTML Cleanup")
+    print("Phase 5: HTML Cleanup (+ Phase 4b lazy loading, same pass)")
     print(f"{'─'*60}")
-    html = phase5_html_cleanup(html)
+    html = cleanup_and_lazy_load(html)
 
     # Phase 3: Font Optimization
     print(f"\n{'─'*60}")
     print("Phase 3: Font Optimization")
     print(f"{'─'*60}")
-    phase3a_trim_google_fonts()
+    phase3a_trim_google_fonts(html)
     phase3b_remove_legacy_font_formats()
     phase3c_remove_unused_font_files()
 
@@ -486,7 +621,6 @@ def main():
     print("Phase 4: Image Optimization")
     print(f"{'─'*60}")
     html = phase4a_convert_large_pngs_to_webp(html)
-    html = phase4b_add_lazy_loading(html)
 
     # Phase 1: CTA Deduplication — DISABLED
     # The original site has TWO distinct CTA types (email forms vs button links)
@@ -503,19 +637,19 @@ def main():
     print(f"{'─'*60}")
 
     # Write optimized HTML
-    with open(INDEX_PATH, "w", encoding="utf-8") as f:
+    with open(INDEX_PATH, "w", encoding="utf-8", buffering=IO_BUFFER_SIZE) as f:
         f.write(html)
 
+    # Phase 6: Precompression
+    print(f"\n{'─'*60}")
+    print("Phase 6: Precompression")
+    print(f"{'─'*60}")
+    phase6_precompress()
+
     # Final sizes
     final_html_size = file_size_kb(INDEX_PATH)
-    final_fonts_size = sum(
-        os.path.getsize(os.path.join(FONTS_DIR, f))
-        for f in os.listdir(FONTS_DIR) if not f.startswith('.')
-    ) / 1024
-    final_images_size = sum(
-        os.path.getsize(os.path.join(IMAGES_DIR, f))
-        for f in os.listdir(IMAGES_DIR) if not f.startswith('.')
-    ) / 1024
+    final_fonts_size = dir_size_kb(FONTS_DIR)
+    final_images_size = dir_size_kb(IMAGES_DIR)
 
     print(f"\n{'='*60}")
     print("RESULTS")
@@ -7,67 +7,178 @@ Session #14 renamed structural IDs (section, row, col).
 This script renames the remaining content-level random IDs.
 """
 
+import bisect
+import mmap
+import os
 import re
 import json
+import shutil
 import unicodedata
+from html import unescape
 from pathlib import Path
 
+try:
+    import orjson  # optional: serializes the ID map faster than json
+except ImportError:
+    orjson = None
+
+from html_regex import trie_regex
+
 HTML_FILE = Path(__file__).parent / "index.html"
 MAP_FILE = Path(__file__).parent / "content_id_map.json"
 
 
+# Fixed patterns, compiled once at import
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+# Deletes every ASCII character a slug can't contain (anything but a-z, 0-9
+# and whitespace) in one str.translate call
+_SLUG_DROP_TABLE = str.maketrans('', '', ''.join(
+    ch for ch in map(chr, range(128))
+    if not (ch.isdigit() or 'a' <= ch <= 'z' or ch.isspace())
+))
+_ANY_ID_RE = re.compile(r'id="([^"]+)"')
+_SECTION_ID_RE = re.compile(r'id="(section-[^"]+)"')
+
+# Matched from just after an element's id="..." attribute, which is located
+# with str.find, so no per-ID pattern has to be escaped and compiled. The
+# skipped markup is consumed possessively (text runs, then any tag that isn't
+# the one being looked for), so the engine never backtracks through it; each
+# stops at the same place the lazy .*? did.
+_ELEMENT_TEXT_TAIL_RE = re.compile(r'[^>]*>((?:[^<]++|<(?!/div>|/span>))*+)(?:</div>|</span>)')
+_IMG_SRC_TAIL_RE = re.compile(r'[^>]*>(?:[^<]++|<(?!img[^>]*src="))*+<img[^>]*src="([^"]*)"')
+_IMG_ALT_TAIL_RE = re.compile(r'[^>]*>(?:[^<]++|<(?!img[^>]*alt="))*+<img[^>]*alt="([^"]*)"')
+
+
 def strip_html(text: str) -> str:
-    """Remove HTML tags and normalize whitespace."""
-    text = re.sub(r'<[^>]+>', ' ', text)
-    text = re.sub(r'&nbsp;', ' ', text)
-    text = re.sub(r'&amp;', 'and', text)
-    text = re.sub(r'&[a-z]+;', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    """Remove HTML tags, decode entities and normalize whitespace."""
+    text = _TAG_RE.sub(' ', text)
+    # &amp; reads as "and" in generated names; html.unescape decodes every
+    # other named and numeric reference (&nbsp; becomes a space below)
+    text = unescape(text.replace('&amp;', 'and'))
+    text = _WS_RE.sub(' ', text).strip()
     return text
 
 
+# How much raw markup strip_html_prefix strips first (extended to the next '>')
+STRIP_PREFIX_CHARS = 400
+
+
+def strip_html_prefix(text: str, limit: int) -> str:
+    """strip_html(text)[:limit], stripping only the front of text when that is enough.
+
+    text is cut just after the first '>' past STRIP_PREFIX_CHARS. No tag can
+    span a '>', and cutting there doesn't change how any entity before it
+    decodes, so the stripped head is a prefix of the full result.
+    """
+    cut = text.find('>', STRIP_PREFIX_CHARS) + 1
+    if cut:
+        head = strip_html(text[:cut])
+        if len(head) >= limit:
+            return head[:limit]
+    return strip_html(text)[:limit]
+
+
 def slugify(text: str, max_words: int = 5, max_len: int = 40) -> str:
     """Convert text to a kebab-case slug."""
     text = unicodedata.normalize('NFKD', text)
     text = text.encode('ascii', 'ignore').decode('ascii')
     text = text.lower()
-    text = re.sub(r'[^a-z0-9\s]', '', text)
+    text = text.translate(_SLUG_DROP_TABLE)
     words = text.split()[:max_words]
     slug = '-'.join(words)
     return slug[:max_len].rstrip('-')
 
 
-def extract_element_content(content: str, element_id: str, element_type: str) -> str:
+def build_id_offsets(content: str) -> dict[str, int]:
+    """Map every id="..." value to the offset of its first occurrence.
+
+    One scan of the document; the generators look elements up here instead
+    of running content.find over the whole page for each one.
+    """
+    offsets = {}
+    for m in _ANY_ID_RE.finditer(content):
+        offsets.setdefault(m.group(1), m.start())
+    return offsets
+
+
+# How far back from an element its enclosing section's id may be
+SECTION_LOOKBACK = 3000
+
+
+def build_section_index(content: str) -> tuple[list[int], list[int], list[str]]:
+    """End offsets, start offsets and names of every section id="..." attribute, in page order."""
+    ends, starts, names = [], [], []
+    for m in _SECTION_ID_RE.finditer(content):
+        ends.append(m.end())
+        starts.append(m.start())
+        names.append(m.group(1))
+    return ends, starts, names
+
+
+def nearest_section(sections: tuple[list[int], list[int], list[str]], offset: int) -> str:
+    """Name (without "section-") of the last section id ending before offset.
+
+    Only ids that lie entirely within SECTION_LOOKBACK characters of the
+    element count, matching a search of content[offset - 3000:offset]; the
+    lookup is a bisect instead of a regex scan of that slice.
+    """
+    ends, starts, names = sections
+    i = bisect.bisect_right(ends, offset) - 1
+    if i >= 0 and starts[i] >= offset - SECTION_LOOKBACK:
+        return names[i].replace('section-', '')
+    return ""
+
+
+def _match_after_id(tail_re: re.Pattern, content: str, offsets: dict[str, int], element_id: str) -> re.Match | None:
+    """Match tail_re right after the element's id="..." attribute."""
+    idx = offsets.get(element_id, -1)
+    if idx < 0:
+        return None
+    return tail_re.match(content, idx + len(f'id="{element_id}"'))
+
+
+def extract_element_content(content: str, offsets: dict[str, int], element_id: str, element_type: str) -> str:
     """Extract readable text content from an element."""
     # Find the element by ID and grab content after it
-    pattern = rf'id="{re.escape(element_id)}"[^>]*>(.*?)(?:</div>|</span>)'
-    m = re.search(pattern, content, re.DOTALL)
+    m = _match_after_id(_ELEMENT_TEXT_TAIL_RE, content, offsets, element_id)
     if m:
-        return strip_html(m.group(1))[:200]
+        return strip_html_prefix(m.group(1), 200)
 
     # Fallback: just grab text after the id
-    idx = content.find(f'id="{element_id}"')
+    idx = offsets.get(element_id, -1)
     if idx >= 0:
         chunk = content[idx:idx + 600]
-        return strip_html(chunk)[:200]
+        return strip_html_prefix(chunk, 200)
 
     return ""
 
 
-def find_all_content_ids(content: str) -> dict[str, list[str]]:
-    """Find all content-level GHL IDs grouped by type."""
-    types = {
-        'heading': r'id="(heading-[A-Za-z0-9_-]{6,})"',
-        'sub-heading': r'id="(sub-heading-[A-Za-z0-9_-]{6,})"',
-        'image': r'id="(image-[A-Za-z0-9_-]{6,})"',
-        'video': r'id="(video-[A-Za-z0-9_-]{6,})"',
-        'button': r'id="(button-[A-Za-z0-9_-]{6,})"',
-        'divider': r'id="(divider-[A-Za-z0-9_-]{6,})"',
-    }
+# Content element types, in processing order
+CONTENT_TYPES = ('heading', 'sub-heading', 'image', 'video', 'button', 'divider')
+
+# A content-level GHL ID value; group 1 is the element type
+_CONTENT_ID_RE = re.compile(
+    r'(' + '|'.join(map(re.escape, CONTENT_TYPES)) + r')-[A-Za-z0-9_-]{6,}'
+)
+
+
+def find_all_content_ids(offsets: dict[str, int]) -> dict[str, list[str]]:
+    """Find all content-level GHL IDs grouped by type.
+
+    Reads the ids already collected by build_id_offsets, so discovery costs
+    no extra scan of the document.
+    """
+    # The offset index holds each id once, so no dedupe is needed
+    found = {typ: [] for typ in CONTENT_TYPES}
+    for element_id in offsets:
+        m = _CONTENT_ID_RE.fullmatch(element_id)
+        if m:
+            found[m.group(1)].append(element_id)
 
     result = {}
-    for typ, pattern in types.items():
-        ids = sorted(set(re.findall(pattern, content)))
+    for typ, type_ids in found.items():
+        ids = sorted(type_ids)
         # Skip _btn suffixed variants (they derive from the base button ID)
         if typ == 'button':
             ids = [i for i in ids if not i.endswith('_btn')]
@@ -77,89 +188,99 @@ def find_all_content_ids(content: str) -> dict[str, list[str]]:
     return result
 
 
-def generate_heading_name(content: str, element_id: str, idx: int, used: set) -> str:
+def _unique(name: str, used: set) -> str:
+    """Claim name in used, appending -2, -3, ... if it is already taken."""
+    if name in used:
+        i = 2
+        while f'{name}-{i}' in used:
+            i += 1
+        name = f'{name}-{i}'
+    used.add(name)
+    return name
+
+
+# Known headings mapped to specific names. Matched case-insensitively as a
+# substring of the heading text; the first entry that matches wins.
+KNOWN_HEADINGS = {
+    'Dear Future 1 Click Client Onboarding': 'dear-future-owner',
+    'Before we created the 1 Click': 'before-we-created',
+    'Every business scales': 'every-business-scales',
+    'So we decided to find': 'decided-find-better-way',
+    'After several months': 'after-several-months',
+    'Now, you have the opportunity': 'opportunity-to-duplicate',
+    'See below to learn how it works': 'see-below-how-it-works',
+    'This Is Serge': 'case-serge',
+    'Splash CEO': 'case-splash',
+    'This is Bastiaan': 'case-bastiaan',
+    'Yoon Kim': 'case-yoon',
+    'Megan Walsh': 'case-megan',
+    'Mehdi': 'case-mehdi',
+    'Ben Fewtrell': 'case-ben',
+    'Franck Drouhin': 'case-franck',
+    'Dominic': 'case-dominic',
+    'Here\'s a sneak peek': 'sneak-peek',
+    'Check Out The Step-By-Step Video Demo': 'video-demo-heading',
+    'Here\'s What A Few Member': 'testimonials-heading',
+    'The #1 Mistake Everyone': 'number-one-mistake',
+    'And The Result Of Using This New Way': 'result-new-way',
+    'And Just A Few Years Ago': 'few-years-ago',
+    'But before you do': 'before-you-do-intro',
+    'I\'ll talk to you in our private Community': 'talk-in-community',
+    'The 1CCO System was the perfect thing': 'perfect-for-clients',
+    'In fact: we rarely': 'rarely-build-without-knowing',
+    'Right now, as you\'re reading': 'right-now-reading',
+    'Track upcoming and finances': 'track-finances',
+    'Bridge the communication': 'bridge-communication',
+    'You Don\'t Even Have To Keep Track Of Payment': 'no-payment-tracking',
+    'And the best part that attracted me': 'best-part-attracted',
+    'it took me 4 years': 'took-4-years',
+    'Step 1': 'step-1',
+    'Step 2': 'step-2',
+    'Step 3': 'step-3',
+    'Step 4': 'step-4',
+    'Step 5': 'step-5',
+    'Step 6': 'step-6',
+    'Step 7': 'step-7',
+    'Step 8': 'step-8',
+    'Despite exploring various': 'despite-exploring',
+    'Our solution was to overhaul': 'overhaul-dominic',
+    'He Ended Up Stressed': 'stressed-daily',
+    'All systems accessible': 'systems-accessible',
+    '$47.00': 'cta-price',
+    '(Save $250.00 today)': 'cta-save',
+    'Install Now': 'cta-install',
+    'The 1 Click Client Onboarding Install Pack is a counterintuitive': 'counterintuitive-approach',
+    'This Install Pack works with all website': 'works-with-all',
+    'We achieve this by finding': 'achieve-by-finding',
+    'And as a result': 'frees-you-up',
+}
+
+# All known prefixes (lowercased) in one pattern. Each is wrapped in a
+# lookahead so matches can overlap: at every position the earliest entry that
+# matches there is reported, and the lowest index over all positions is the
+# entry the in-order loop would have picked.
+_KNOWN_HEADING_INDEX = {prefix.lower(): i for i, prefix in enumerate(KNOWN_HEADINGS)}
+_KNOWN_HEADING_NAMES = list(KNOWN_HEADINGS.values())
+_KNOWN_HEADING_RE = re.compile(
+    '(?=(' + '|'.join(map(re.escape, _KNOWN_HEADING_INDEX)) + '))'
+)
+
+
+def generate_heading_name(content: str, offsets: dict[str, int], sections: tuple, element_id: str, idx: int, used: set) -> str:
     """Generate semantic name for a heading element."""
-    text = extract_element_content(content, element_id, 'heading')
+    text = extract_element_content(content, offsets, element_id, 'heading')
 
     # Map known headings to specific names
-    known = {
-        'Dear Future 1 Click Client Onboarding': 'dear-future-owner',
-        'Before we created the 1 Click': 'before-we-created',
-        'Every business scales': 'every-business-scales',
-        'So we decided to find': 'decided-find-better-way',
-        'After several months': 'after-several-months',
-        'Now, you have the opportunity': 'opportunity-to-duplicate',
-        'See below to learn how it works': 'see-below-how-it-works',
-        'This Is Serge': 'case-serge',
-        'Splash CEO': 'case-splash',
-        'This is Bastiaan': 'case-bastiaan',
-        'Yoon Kim': 'case-yoon',
-        'Megan Walsh': 'case-megan',
-        'Mehdi': 'case-mehdi',
-        'Ben Fewtrell': 'case-ben',
-        'Franck Drouhin': 'case-franck',
-        'Dominic': 'case-dominic',
-        'Here\'s a sneak peek': 'sneak-peek',
-        'Check Out The Step-By-Step Video Demo': 'video-demo-heading',
-        'Here\'s What A Few Member': 'testimonials-heading',
-        'The #1 Mistake Everyone': 'number-one-mistake',
-        'And The Result Of Using This New Way': 'result-new-way',
-        'And Just A Few Years Ago': 'few-years-ago',
-        'But before you do': 'before-you-do-intro',
-        'I\'ll talk to you in our private Community': 'talk-in-community',
-        'The 1CCO System was the perfect thing': 'perfect-for-clients',
-        'In fact: we rarely': 'rarely-build-without-knowing',
-        'Right now, as you\'re reading': 'right-now-reading',
-        'Track upcoming and finances': 'track-finances',
-        'Bridge the communication': 'bridge-communication',
-        'You Don\'t Even Have To Keep Track Of Payment': 'no-payment-tracking',
-        'And the best part that attracted me': 'best-part-attracted',
-        'it took me 4 years': 'took-4-years',
-        'Step 1': 'step-1',
-        'Step 2': 'step-2',
-        'Step 3': 'step-3',
-        'Step 4': 'step-4',
-        'Step 5': 'step-5',
-        'Step 6': 'step-6',
-        'Step 7': 'step-7',
-        'Step 8': 'step-8',
-        'Despite exploring various': 'despite-exploring',
-        'Our solution was to overhaul': 'overhaul-dominic',
-        'He Ended Up Stressed': 'stressed-daily',
-        'All systems accessible': 'systems-accessible',
-        '$47.00': 'cta-price',
-        '(Save $250.00 today)': 'cta-save',
-        'Install Now': 'cta-install',
-        'The 1 Click Client Onboarding Install Pack is a counterintuitive': 'counterintuitive-approach',
-        'This Install Pack works with all website': 'works-with-all',
-        'We achieve this by finding': 'achieve-by-finding',
-        'And as a result': 'frees-you-up',
-    }
-
-    for prefix, name in known.items():
-        if prefix.lower() in text.lower():
-            candidate = name
-            if candidate in used:
-                # Append a counter
-                i = 2
-                while f'{candidate}-{i}' in used:
-                    i += 1
-                candidate = f'{candidate}-{i}'
-            used.add(candidate)
-            return candidate
+    hits = [_KNOWN_HEADING_INDEX[m.group(1)]
+            for m in _KNOWN_HEADING_RE.finditer(text.lower())]
+    if hits:
+        return _unique(_KNOWN_HEADING_NAMES[min(hits)], used)
 
     # Auto-generate from content
     if text:
         slug = slugify(text)
         if slug and len(slug) > 3:
-            candidate = slug
-            if candidate in used:
-                i = 2
-                while f'{candidate}-{i}' in used:
-                    i += 1
-                candidate = f'{candidate}-{i}'
-            used.add(candidate)
-            return candidate
+            return _unique(slug, used)
 
     # Fallback: numbered
     candidate = f'text-{idx}'
@@ -167,65 +288,57 @@ def generate_heading_name(content: str, element_id: str, idx: int, used: set) ->
     return candidate
 
 
-def generate_image_name(content: str, element_id: str, idx: int, used: set) -> str:
+def generate_image_name(content: str, offsets: dict[str, int], sections: tuple, element_id: str, idx: int, used: set) -> str:
     """Generate semantic name for an image element."""
     # Find the img src
-    pattern = rf'id="{re.escape(element_id)}"[^>]*>.*?<img[^>]*src="([^"]*)"'
-    m = re.search(pattern, content, re.DOTALL)
+    m = _match_after_id(_IMG_SRC_TAIL_RE, content, offsets, element_id)
     src = m.group(1) if m else ""
 
     # Also check for alt text
-    pattern2 = rf'id="{re.escape(element_id)}"[^>]*>.*?<img[^>]*alt="([^"]*)"'
-    m2 = re.search(pattern2, content, re.DOTALL)
+    m2 = _match_after_id(_IMG_ALT_TAIL_RE, content, offsets, element_id)
     alt = m2.group(1) if m2 else ""
 
-    # Try to get context from nearby headings/text
-    img_idx = content.find(f'id="{element_id}"')
+    # Try to get context from the nearest section
+    img_idx = offsets.get(element_id, -1)
     context_name = ""
     if img_idx >= 0:
-        before = content[max(0, img_idx - 3000):img_idx]
-        # Find the nearest section
-        sections = re.findall(r'id="(section-[^"]+)"', before)
-        section = sections[-1].replace('section-', '') if sections else ""
-        # Find nearest heading text
-        headings = re.findall(r'<h[1-6][^>]*>(.*?)</h[1-6]>', before, re.DOTALL)
-        heading_text = strip_html(headings[-1])[:60] if headings else ""
-
-        if section:
-            context_name = section
+        context_name = nearest_section(sections, img_idx)
 
     # Use alt text if meaningful
     if alt and len(alt) > 3:
         slug = slugify(alt)
         if slug and len(slug) > 3:
-            candidate = slug
-            if candidate in used:
-                i = 2
-                while f'{candidate}-{i}' in used:
-                    i += 1
-                candidate = f'{candidate}-{i}'
-            used.add(candidate)
-            return candidate
+            return _unique(slug, used)
 
     # Use section context + position
     if context_name:
-        candidate = context_name
-        if candidate in used:
-            i = 2
-            while f'{candidate}-{i}' in used:
-                i += 1
-            candidate = f'{candidate}-{i}'
-        used.add(candidate)
-        return candidate
+        return _unique(context_name, used)
 
     candidate = f'img-{idx}'
     used.add(candidate)
     return candidate
 
 
-def generate_video_name(content: str, element_id: str, idx: int, used: set) -> str:
+# Case study videos: keyword in the text around the video -> name. The first
+# keyword in this order that appears anywhere wins.
+VIDEO_KEYWORDS = {
+    'serge': 'serge', 'splash': 'splash', 'bastiaan': 'bastiaan',
+    'yoon': 'yoon', 'megan': 'megan', 'mehdi': 'mehdi',
+    'ben fewtrell': 'ben', 'franck': 'franck', 'dominic': 'dominic',
+}
+
+# One overlapping-lookahead scan for all keywords, resolved the same way as
+# _KNOWN_HEADING_RE
+_VIDEO_KEYWORD_INDEX = {keyword: i for i, keyword in enumerate(VIDEO_KEYWORDS)}
+_VIDEO_KEYWORD_NAMES = list(VIDEO_KEYWORDS.values())
+_VIDEO_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(map(re.escape, VIDEO_KEYWORDS)) + '))'
+)
+
+
+def generate_video_name(content: str, offsets: dict[str, int], sections: tuple, element_id: str, idx: int, used: set) -> str:
     """Generate semantic name for a video element."""
-    vid_idx = content.find(f'id="{element_id}"')
+    vid_idx = offsets.get(element_id, -1)
     if vid_idx >= 0:
         before = content[max(0, vid_idx - 3000):vid_idx]
         after = content[vid_idx:vid_idx + 500]
@@ -234,25 +347,13 @@ def generate_video_name(content: str, element_id: str, idx: int, used: set) -> s
         combined = text_before + ' ' + text_after
 
         # Find nearest section for fallback
-        sections = re.findall(r'id="(section-[^"]+)"', before)
-        section = sections[-1].replace('section-', '') if sections else ""
+        section = nearest_section(sections, vid_idx)
 
         # Case study videos
-        names_map = [
-            ('serge', 'serge'), ('splash', 'splash'), ('bastiaan', 'bastiaan'),
-            ('yoon', 'yoon'), ('megan', 'megan'), ('mehdi', 'mehdi'),
-            ('ben fewtrell', 'ben'), ('franck', 'franck'), ('dominic', 'dominic'),
-        ]
-        for keyword, name in names_map:
-            if keyword in combined:
-                candidate = name
-                if candidate in used:
-                    i = 2
-                    while f'{candidate}-{i}' in used:
-                        i += 1
-                    candidate = f'{candidate}-{i}'
-                used.add(candidate)
-                return candidate
+        hits = [_VIDEO_KEYWORD_INDEX[m.group(1)]
+                for m in _VIDEO_KEYWORD_RE.finditer(combined)]
+        if hits:
+            return _unique(_VIDEO_KEYWORD_NAMES[min(hits)], used)
 
         # Contextual videos
         if 'sneak peek' in combined:
@@ -266,50 +367,35 @@ def generate_video_name(content: str, element_id: str, idx: int, used: set) -> s
         else:
             name = f'vid-{idx}'
 
-        if name in used:
-            i = 2
-            while f'{name}-{i}' in used:
-                i += 1
-            name = f'{name}-{i}'
-        used.add(name)
-        return name
+        return _unique(name, used)
 
     candidate = f'vid-{idx}'
     used.add(candidate)
     return candidate
 
 
-def generate_subheading_name(content: str, element_id: str, idx: int, used: set) -> str:
+def generate_subheading_name(content: str, offsets: dict[str, int], sections: tuple, element_id: str, idx: int, used: set) -> str:
     """Generate semantic name for a sub-heading element."""
-    text = extract_element_content(content, element_id, 'sub-heading')
+    text = extract_element_content(content, offsets, element_id, 'sub-heading')
 
     if text:
         slug = slugify(text)
         if slug and len(slug) > 3:
-            candidate = slug
-            if candidate in used:
-                i = 2
-                while f'{candidate}-{i}' in used:
-                    i += 1
-                candidate = f'{candidate}-{i}'
-            used.add(candidate)
-            return candidate
+            return _unique(slug, used)
 
     candidate = f'subhead-{idx}'
     used.add(candidate)
     return candidate
 
 
-def generate_button_name(content: str, element_id: str, idx: int, used: set) -> str:
+def generate_button_name(content: str, offsets: dict[str, int], sections: tuple, element_id: str, idx: int, used: set) -> str:
     """Generate semantic name for a button element."""
-    btn_idx = content.find(f'id="{element_id}"')
+    btn_idx = offsets.get(element_id, -1)
     if btn_idx >= 0:
-        before = content[max(0, btn_idx - 3000):btn_idx]
         after = content[btn_idx:btn_idx + 500]
 
         # Find nearest section
-        sections = re.findall(r'id="(section-[^"]+)"', before)
-        section = sections[-1].replace('section-', '') if sections else ""
+        section = nearest_section(sections, btn_idx)
 
         # Get button text
         text = strip_html(after)[:100].lower()
@@ -323,45 +409,39 @@ def generate_button_name(content: str, element_id: str, idx: int, used: set) ->
         else:
             candidate = f'cta-{idx}'
 
-        if candidate in used:
-            i = 2
-            while f'{candidate}-{i}' in used:
-                i += 1
-            candidate = f'{candidate}-{i}'
-        used.add(candidate)
-        return candidate
+        return _unique(candidate, used)
 
     candidate = f'cta-{idx}'
     used.add(candidate)
     return candidate
 
 
-def generate_divider_name(content: str, element_id: str, idx: int, used: set) -> str:
+def generate_divider_name(content: str, offsets: dict[str, int], sections: tuple, element_id: str, idx: int, used: set) -> str:
     """Generate semantic name for a divider element."""
-    div_idx = content.find(f'id="{element_id}"')
+    div_idx = offsets.get(element_id, -1)
     if div_idx >= 0:
-        before = content[max(0, div_idx - 3000):div_idx]
-        sections = re.findall(r'id="(section-[^"]+)"', before)
-        if sections:
-            section = sections[-1].replace('section-', '')
-            candidate = section
-            if candidate in used:
-                i = 2
-                while f'{candidate}-{i}' in used:
-                    i += 1
-                candidate = f'{candidate}-{i}'
-            used.add(candidate)
-            return candidate
+        section = nearest_section(sections, div_idx)
+        if section:
+            return _unique(section, used)
 
     candidate = f'sep-{idx}'
     used.add(candidate)
     return candidate
 
 
-def do_replacement(content: str, old_base: str, new_base: str, element_type: str) -> tuple[str, int]:
-    """Replace all occurrences of an ID and its derived class names."""
-    count = 0
+# Class prefix GHL derives from each element type (cheading-XXX, cimage-XXX, ...)
+C_PREFIX_MAP = {
+    'heading': 'cheading',
+    'sub-heading': 'csub-heading',
+    'image': 'cimage',
+    'video': 'cvideo',
+    'button': 'cbutton',
+    'divider': 'cdivider',
+}
 
+
+def replacement_pairs(old_base: str, new_base: str, element_type: str) -> list[tuple[str, str]]:
+    """The (old, new) strings to rewrite for one renamed ID and its derived class names."""
     # The GHL pattern: id="heading-XXX" generates:
     #   - id="heading-XXX" (HTML attribute)
     #   - class="heading-XXX ..." and class="... cheading-XXX ..."
@@ -373,40 +453,46 @@ def do_replacement(content: str, old_base: str, new_base: str, element_type: str
     old_suffix = old_base[len(type_prefix) + 1:]  # e.g., "0A77P26Q7U"
     new_id = f'{type_prefix}-{new_base}'  # e.g., "heading-before-we-created"
 
-    # Replace the base ID
-    c = content.count(old_id)
-    if c > 0:
-        content = content.replace(old_id, new_id)
-        count += c
-
-    # Replace the c-prefixed class (cheading-XXX, cimage-XXX, etc.)
-    # Map type to c-prefix
-    c_prefix_map = {
-        'heading': 'cheading',
-        'sub-heading': 'csub-heading',
-        'image': 'cimage',
-        'video': 'cvideo',
-        'button': 'cbutton',
-        'divider': 'cdivider',
-    }
-    c_prefix = c_prefix_map.get(type_prefix, f'c{type_prefix}')
-    old_c = f'{c_prefix}-{old_suffix}'
-    new_c = f'{c_prefix}-{new_base}'
-    c2 = content.count(old_c)
-    if c2 > 0:
-        content = content.replace(old_c, new_c)
-        count += c2
-
-    return content, count
-
-
-def main():
-    content = HTML_FILE.read_text()
-    original_len = len(content)
-
-    all_ids = find_all_content_ids(content)
-    id_map = {}
-    total_replacements = 0
+    # The base ID, then the c-prefixed class (cheading-XXX, cimage-XXX, etc.)
+    c_prefix = C_PREFIX_MAP.get(type_prefix, f'c{type_prefix}')
+    return [
+        (old_id, new_id),
+        (f'{c_prefix}-{old_suffix}', f'{c_prefix}-{new_base}'),
+    ]
+
+
+def replace_all(data, renames: dict[str, str]) -> tuple[bytes, dict[str, int]]:
+    """Apply every rename in one pass; return the new content and per-key hit counts.
+
+    Works on the raw UTF-8 bytes (any buffer, e.g. an mmap of the page). The
+    keys are matched through the same prefix-trie pattern rename_ids.py uses:
+    several hundred IDs share six type prefixes, so the engine follows one
+    branch per character rather than trying each key in turn, and the longest
+    key still wins.
+    """
+    counts = dict.fromkeys(renames, 0)
+    if not renames:
+        return bytes(data), counts
+    encoded = {old.encode(): (old, new.encode()) for old, new in renames.items()}
+    pattern = re.compile(trie_regex(renames).encode())
+
+    def repl(m):
+        old, new = encoded[m.group(0)]
+        counts[old] += 1
+        return new
+
+    return pattern.sub(repl, data), counts
+
+
+def plan_renames(content: str) -> tuple[dict[str, str], dict[str, list]]:
+    """Name every content element; return the strings to rewrite and the per-type plan."""
+    # Names are generated from the page as read: one scan indexes every id
+    # attribute, which both discovers the content IDs and lets each generator
+    # look its element up. The renames are applied afterwards, so these
+    # offsets never go stale.
+    offsets = build_id_offsets(content)
+    all_ids = find_all_content_ids(offsets)
+    sections = build_section_index(content)
 
     # Process each type
     generators = {
@@ -418,20 +504,46 @@ def main():
         'divider': generate_divider_name,
     }
 
+    renames = {}
+    planned = {}  # element_type -> [(old_id, new_full_id, keys rewritten)]
     for element_type, ids in all_ids.items():
         used_names: set[str] = set()
         gen_func = generators[element_type]
-        type_count = 0
+        planned[element_type] = []
 
         for idx, old_id in enumerate(ids, 1):
-            new_name = gen_func(content, old_id, idx, used_names)
+            new_name = gen_func(content, offsets, sections, old_id, idx, used_names)
             new_full_id = f'{element_type}-{new_name}'
 
             # Skip if new name would be the same
             if old_id == new_full_id:
                 continue
 
-            content, replacements = do_replacement(content, old_id, new_name, element_type)
+            pairs = replacement_pairs(old_id, new_name, element_type)
+            renames.update(pairs)
+            planned[element_type].append((old_id, new_full_id, [old for old, _ in pairs]))
+
+    return renames, planned
+
+
+def main():
+    # The page is mapped rather than read: naming works on one decoded copy,
+    # which is dropped before the rewrite, and the rewrite runs on the mapped
+    # bytes directly, so the old and new documents are never both held as str
+    with open(HTML_FILE, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        original_len = len(mm)
+        renames, planned = plan_renames(str(mm, 'utf-8'))
+
+        # Then rewrite the whole page in a single pass
+        output, counts = replace_all(mm, renames)
+
+    id_map = {}
+    total_replacements = 0
+
+    for element_type, elements in planned.items():
+        type_count = 0
+        for old_id, new_full_id, keys in elements:
+            replacements = sum(counts[key] for key in keys)
             if replacements > 0:
                 id_map[old_id] = new_full_id
                 type_count += replacements
@@ -439,12 +551,19 @@ def main():
 
         print(f'{element_type}: renamed {len([k for k in id_map if k.startswith(element_type)])} elements ({type_count} replacements)')
 
-    # Write output
-    HTML_FILE.write_text(content)
-    MAP_FILE.write_text(json.dumps(id_map, indent=2, ensure_ascii=False))
+    # Write output to a temp file and swap it into place, so index.html is
+    # never left half-written
+    tmp_file = HTML_FILE.with_name(HTML_FILE.name + '.tmp')
+    tmp_file.write_bytes(output)
+    shutil.copymode(HTML_FILE, tmp_file)
+    os.replace(tmp_file, HTML_FILE)
+    if orjson is not None:
+        MAP_FILE.write_bytes(orjson.dumps(id_map, option=orjson.OPT_INDENT_2))
+    else:
+        MAP_FILE.write_text(json.dumps(id_map, indent=2, ensure_ascii=False))
 
     print(f'\nTotal: {len(id_map)} elements renamed, {total_replacements} replacements')
-    print(f'File size: {original_len:,} → {len(content):,} bytes')
+    print(f'File size: {original_len:,} → {len(output):,} bytes')
     print(f'Map saved to {MAP_FILE}')
 
 
@@ -21,6 +21,13 @@ import re
 import shutil
 from datetime import datetime
 
+try:
+    import orjson  # optional: serializes the ID map faster than json
+except ImportError:
+    orjson = None
+
+from html_regex import trie_regex
+
 HTML_PATH = os.path.join(os.path.dirname(__file__), "index.html")
 
 # =============================================================================
@@ -230,9 +237,21 @@ def rename_ids(html_path=HTML_PATH):
     # that a plain replace catches all contexts:
     #   id="section-OLD", #section-OLD, .section-OLD, .bg-section-OLD,
     #   and class="... section-OLD ..."
+    # All IDs go into one trie-shaped pattern (longest match wins, so no ID
+    # can rewrite part of a longer one) and the file is rewritten in a
+    # single pass.
+    counts = dict.fromkeys(all_maps, 0)
+
+    def replace_id(m):
+        old_id = m.group(0)
+        counts[old_id] += 1
+        return all_maps[old_id]
+
+    id_pattern = re.compile(trie_regex(all_maps))
+    content = id_pattern.sub(replace_id, content)
+
     for old_id, new_id in all_maps.items():
-        count = content.count(old_id)
-        content = content.replace(old_id, new_id)
+        count = counts[old_id]
 
         if count > 0:
             print(f"  {old_id} → {new_id}  ({count} replacements)")
@@ -241,23 +260,32 @@ def rename_ids(html_path=HTML_PATH):
 
         total_replacements += count
 
-    # Write modified file
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(content)
+    # Write modified file: encode once, write the bytes to a temp file, then
+    # swap it into place so index.html is never left half-written
+    tmp_path = html_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content.encode("utf-8"))
+    shutil.copymode(html_path, tmp_path)
+    os.replace(tmp_path, html_path)
 
     new_size = len(content)
 
     # Output the mapping as JSON for reference
     map_path = os.path.join(os.path.dirname(html_path), "id_map.json")
-    with open(map_path, "w", encoding="utf-8") as f:
-        json.dump({
-            "generated": datetime.now().isoformat(),
-            "total_ids_renamed": len(all_maps),
-            "total_replacements": total_replacements,
-            "sections": SECTION_MAP,
-            "rows": ROW_MAP,
-            "columns": COL_MAP,
-        }, f, indent=2)
+    id_map = {
+        "generated": datetime.now().isoformat(),
+        "total_ids_renamed": len(all_maps),
+        "total_replacements": total_replacements,
+        "sections": SECTION_MAP,
+        "rows": ROW_MAP,
+        "columns": COL_MAP,
+    }
+    if orjson is not None:
+        with open(map_path, "wb") as f:
+            f.write(orjson.dumps(id_map, option=orjson.OPT_INDENT_2))
+    else:
+        with open(map_path, "w", encoding="utf-8") as f:
+            json.dump(id_map, f, indent=2)
 
     print(f"\nDone!")
     print(f"  IDs renamed: {len(all_maps)}")
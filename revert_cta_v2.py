@@ -10,8 +10,10 @@ FIX: The replacement now ends at inner_white_bkg close (matching what the regex
 consumes). The original top_right_sec close remains in place.
 """
 
+import mmap
 import os
 import re
+import shutil
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 INDEX_PATH = os.path.join(BASE_DIR, "index.html")
@@ -46,73 +48,147 @@ NEW_CTA_INNER = '''<p class="toptxt">DIGITAL DOWNLOAD NOW AVAILABLE</p>
 						</div>'''
 
 
-def main():
-    with open(INDEX_PATH, "r", encoding="utf-8") as f:
-        html = f.read()
-
-    original_len = len(html)
-
-    # Step 1: Replace all CTA block contents
-    # The regex matches from <div class="top_right_sec big_cta"> through the
-    # FIRST pair of consecutive </div> tags (non-greedy). This consumes:
-    #   - Opening: <div class="top_right_sec big_cta">
-    #   - All inner content
-    #   - Two closing </div>: close-last-text-center + close-inner_white_bkg
-    # It does NOT consume the </div> for top_right_sec itself.
-    cta_pattern = re.compile(
-        r'(<div class="top_right_sec big_cta">)\s*'
-        r'<p class="toptxt">DIGITAL DOWNLOAD NOW AVAILABLE</p>'
-        r'.*?'  # All inner content (non-greedy)
-        r'</div>\s*</div>',  # Close last-text-center + close inner_white_bkg
-        re.DOTALL
-    )
-
-    matches = list(cta_pattern.finditer(html))
-    print(f"Found {len(matches)} CTA blocks")
-
-    if len(matches) < 15:
-        print(f"ERROR: Expected ~20 CTAs, found {len(matches)}. Aborting.")
+# Encoded once at import; the page is rewritten as bytes
+NEW_CTA_INNER_BYTES = NEW_CTA_INNER.encode("utf-8")
+
+CTA_OPEN = b'<div class="top_right_sec big_cta">'
+
+# What each matched block becomes, built once at import.
+# KEY FIX: replacement does NOT include </div> for top_right_sec.
+# The original </div> after the matched block handles that.
+CTA_REPLACEMENT = CTA_OPEN + b'\n' + NEW_CTA_INNER_BYTES
+
+# The toptxt paragraph that must follow the opener (after optional whitespace)
+_CTA_TOPTXT_RE = re.compile(rb'\s*<p class="toptxt">DIGITAL DOWNLOAD NOW AVAILABLE</p>')
+
+# End of a CTA block: a </div> followed, after optional whitespace, by
+# another. Literal-led with a possessive gap, so a search jumps from one
+# </div> to the next and never backtracks.
+_BLOCK_END_RE = re.compile(rb'</div>\s*+</div>')
+
+# A .cta-email-form CSS rule, matched from the class name; the blank lines
+# before it are taken off separately
+_CSS_RULE_RE = re.compile(rb'\.cta-email-form\s*\{[^}]*\}\s*')
+
+# Either thing the rewrite acts on; both branches are literals, so the
+# search skips ahead between them
+_CTA_OR_CSS_RE = re.compile(re.escape(CTA_OPEN) + rb'|\.cta-email-form')
+
+
+def rewrite_page(html):
+    """Replace every CTA block and drop every .cta-email-form CSS rule.
+
+    Returns (new_html, cta_count, css_count). html is the raw page bytes (or
+    an mmap of them); both edits are made in one left-to-right walk, with
+    untouched slices and replacements collected in a list and joined once.
+    new_html is None when the page is already canonical (every block equals
+    the replacement and there is no CSS to drop), so nothing is rebuilt.
+
+    A CTA block runs from <div class="top_right_sec big_cta"> (followed by
+    the toptxt paragraph) through the FIRST pair of consecutive </div> tags.
+    This consumes:
+      - Opening: <div class="top_right_sec big_cta">
+      - All inner content
+      - Two closing </div>: close-last-text-center + close-inner_white_bkg
+    It does NOT consume the </div> for top_right_sec itself.
+
+    A CSS rule is replaced, together with any newlines directly before it
+    and the whitespace after it, by a single newline.
+    """
+    parts = []
+    cta_count = css_count = 0
+    changed = False
+    last = pos = 0
+    while True:
+        m = _CTA_OR_CSS_RE.search(html, pos)
+        if m is None:
+            break
+        start = m.start()
+
+        if m.group() == CTA_OPEN:
+            toptxt = _CTA_TOPTXT_RE.match(html, m.end())
+            end = _BLOCK_END_RE.search(html, toptxt.end()) if toptxt else None
+            if end is None:
+                pos = start + 1
+                continue
+            parts.append(html[last:start])
+            parts.append(CTA_REPLACEMENT)
+            cta_count += 1
+            changed = changed or html[start:end.end()] != CTA_REPLACEMENT
+        else:
+            end = _CSS_RULE_RE.match(html, start)
+            if end is None:
+                pos = start + 1
+                continue
+            while start > last and html[start - 1] == ord('\n'):
+                start -= 1
+            parts.append(html[last:start])
+            parts.append(b'\n')
+            css_count += 1
+            changed = True
+
+        last = pos = end.end()
+
+    if not changed:
+        return None, cta_count, css_count
+    parts.append(html[last:])
+    return b''.join(parts), cta_count, css_count
+
+
+def revert_cta_file(index_path=INDEX_PATH):
+    """Revert the CTA blocks of one page in place.
+
+    The rewrite itself is rewrite_page(), which takes and returns bytes; this
+    wrapper only does the file I/O and reporting, so other pages can be
+    processed from the same interpreter by passing their path.
+    """
+    # The page is memory-mapped and handled as raw bytes throughout: the
+    # edits are located on the mapping itself and only the rebuilt page is
+    # ever held in memory, with no UTF-8 decode or re-encode
+    with open(index_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        original_len = len(mm)
+
+        # Replace all CTA block contents and remove the .cta-email-form CSS
+        # blocks in the same pass
+        html, cta_count, css_count = rewrite_page(mm)
+
+    print(f"Found {cta_count} CTA blocks")
+
+    if cta_count < 15:
+        print(f"ERROR: Expected ~20 CTAs, found {cta_count}. Aborting.")
         return
 
-    # Replace backwards to preserve positions
-    # KEY FIX: replacement does NOT include </div> for top_right_sec.
-    # The original </div> after the regex match handles that.
-    for match in reversed(matches):
-        start = match.start()
-        end = match.end()
-        replacement = f'<div class="top_right_sec big_cta">\n{NEW_CTA_INNER}'
-        html = html[:start] + replacement + html[end:]
+    # On a re-run every block is already canonical; leave the file alone
+    if html is None:
+        print("All CTA blocks already canonical, no .cta-email-form CSS (unchanged)")
+        return
 
     # Verify replacement
-    count_after = html.count('DIGITAL DOWNLOAD NOW AVAILABLE')
+    count_after = html.count(b'DIGITAL DOWNLOAD NOW AVAILABLE')
     print(f"After replacement: {count_after} CTA blocks")
-
-    # Step 2: Remove .cta-email-form CSS blocks
-    css_pattern = re.compile(
-        r'\n*\.cta-email-form\s*\{[^}]*\}\s*',
-        re.DOTALL
-    )
-    css_matches = list(css_pattern.finditer(html))
-    print(f"Found {len(css_matches)} .cta-email-form CSS blocks to remove")
-    html = css_pattern.sub('\n', html)
+    print(f"Found {css_count} .cta-email-form CSS blocks to remove")
 
     # Verification
     print(f"\nVerification:")
-    print(f"  '256-bit security encryption': {html.count('256-bit security encryption')}")
-    print(f"  'authorized_payments': {html.count('authorized_payments')}")
-    print(f"  'BACKED BY OUR UNCONDITIONAL': {html.count('BACKED BY OUR UNCONDITIONAL')}")
-    print(f"  'height:188px': {html.count('height:188px')}")
-    print(f"  'data-height=\"432\"': {html.count('data-height=\"432\"')}")
-    print(f"  'cta-email-form': {html.count('cta-email-form')}")
-
-    # Write
-    with open(INDEX_PATH, "w", encoding="utf-8") as f:
+    print(f"  '256-bit security encryption': {html.count(b'256-bit security encryption')}")
+    print(f"  'authorized_payments': {html.count(b'authorized_payments')}")
+    print(f"  'BACKED BY OUR UNCONDITIONAL': {html.count(b'BACKED BY OUR UNCONDITIONAL')}")
+    print(f"  'height:188px': {html.count(b'height:188px')}")
+    print(f'''  'data-height="432"': {html.count(b'data-height="432"')}''')
+    print(f"  'cta-email-form': {html.count(b'cta-email-form')}")
+
+    # Write to a temp file and swap it into place, so index.html is never
+    # left half-written
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
         f.write(html)
+    shutil.copymode(index_path, tmp_path)
+    os.replace(tmp_path, index_path)
 
     new_len = len(html)
-    print(f"\nFile size: {original_len:,} -> {new_len:,} chars ({new_len - original_len:+,})")
+    print(f"\nFile size: {original_len:,} -> {new_len:,} bytes ({new_len - original_len:+,})")
     print("Done!")
 
 
 if __name__ == "__main__":
-    main()
+    revert_cta_file()